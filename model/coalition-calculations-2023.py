@@ -7,6 +7,8 @@ import math
 from scipy.spatial.distance import jensenshannon
 import re
 import json
+from historical_index import HistoricalIndex
+from party_registry import canonical_names, coalition_mask, expanded_mask, has_lineage, mask_names, popcount
 
 # -------------------------------
 # Ideological spectrum
@@ -57,7 +59,7 @@ IDEOLOGY_4D_MAP = {
 
 
 def load_data():
-    kabinetten = pd.read_csv('../data/cabinets/kabinetten_schoongemaakt-no2023.csv')
+    kabinetten = pd.read_csv('../data/cabinets/kabinetten_schoongemaakt.csv')
     zetels_100 = pd.read_csv('../data/zetelverdeling/zetel-data/tk_zetels100_1918-1956.csv')
     zetels_150 = pd.read_csv('../data/zetelverdeling/zetel-data/tk_zetels150_1956-2023-no2023.csv')
     zetels = pd.concat([zetels_100, zetels_150], ignore_index=True)
@@ -65,7 +67,8 @@ def load_data():
     ek_75_new = pd.read_csv('../data/zetelverdeling/zetel-data/ek_zetels75_1956-2023_filled.csv')
     ek_zetels = pd.concat([ek_50_old, ek_75_new], ignore_index=True)
 
-    kabinetten['Partijen'] = kabinetten['Partijen'].dropna().str.split(', ')
+    # Cabinet party names as used in the model (e.g. ChristenUnie -> CU, D'66 -> D66)
+    kabinetten['Partijen'] = kabinetten['Partijen'].dropna().str.split(', ').apply(canonical_names)
 
     with open("../methods/topic_vectors.json", "r") as f:
         json_ready_vectors = json.load(f)
@@ -79,13 +82,16 @@ def load_data():
 # -------------------------------
 # Build historical coalition frequency model
 # -------------------------------
-def build_coalition_frequency(kabinetten):
-    coalition_counter = Counter()
-    for partijen in kabinetten['Partijen'].dropna():
-        for r in range(2, len(partijen) + 1):
-            for combo in combinations(sorted(partijen), r):
-                coalition_counter[combo] += 1
-    return coalition_counter
+# Backtest of the 2023 election: only cabinets that took office before it count
+ELECTION_DATE = "2023-11-22"
+
+def build_coalition_frequency(kabinetten, as_of=ELECTION_DATE, half_life=None):
+    """Count every party combination in the cabinets that took office up to ``as_of`` (default: ELECTION_DATE; None: all cabinets).
+
+    With ``half_life`` (in years) older cabinets count less. For several
+    cutoffs, build one HistoricalIndex(kabinetten) and call .counter(as_of).
+    """
+    return HistoricalIndex(kabinetten, half_life).counter(as_of, decayed=half_life is not None)
 
 
 # -------------------------------
@@ -155,40 +161,30 @@ def is_unrealistic_combo(parties):
 # -------------------------------
 # Define new parties
 # -------------------------------
-PARTY_LINEAGE = {
-    "GL/PvdA": ["GL", "PvdA"],  # Merged parties
-    "NSC": ["CDA"],             # NSC is a breakaway from CDA
-    "JA21": ["FvD"],            # JA21 split from FvD
-    # Add other mappings if necessary
-}
-
-def expand_party(party):
-    """Return historical equivalents for a party (e.g., GL/PvdA -> [GL, PvdA])"""
-    return PARTY_LINEAGE.get(party, [party])
+# Lineage (GL/PvdA -> GL + PvdA, NSC <- CDA, JA21 <- FvD) and all party
+# spellings live in party_registry.PARTIES; coalitions are compared as bitmasks.
 
 def get_expanded_coalition(combo):
     """Expand a coalition to include historical equivalents"""
-    expanded = set()
-    for party in combo:
-        expanded.update(expand_party(party))
-    return expanded
+    return set(mask_names(expanded_mask(tuple(combo))))
 
 def calculate_historical_score(combo, coalition_counter, seat_distribution):
     """Compute adjusted historical overlap score using lineage info and seat scaling"""
-    expanded_combo = get_expanded_coalition(combo)
+    expanded_combo = expanded_mask(tuple(combo))
+    lineage_match = any(has_lineage(party) for party in combo)
 
     score = 0
     total_weight = 0  # To keep track of the total weight for normalization
     
     for historical_coalition in coalition_counter:
-        overlap = expanded_combo & set(historical_coalition)
+        overlap = popcount(expanded_combo & coalition_mask(historical_coalition))
         
-        if len(overlap) >= 2:  # If there's enough overlap
+        if overlap >= 2:  # If there's enough overlap
             # Calculate overlap score: how much overlap, divided by the total length of the coalition
-            overlap_score = len(overlap) / len(historical_coalition)
+            overlap_score = overlap / len(historical_coalition)
             
             # Check if it's a lineage-based match (partial weight) or direct match (full weight)
-            if any(party in PARTY_LINEAGE for party in combo):
+            if lineage_match:
                 # If it's from a different lineage, give partial weight
                 overlap_score *= 0.5  # Apply 50% weight for lineage-based matches
             
@@ -7,6 +7,13 @@ import math
 from scipy.spatial.distance import jensenshannon
 import re
 import json
+import heapq
+from bisect import bisect_left
+from voting_agreement import load_voting_agreement
+from coalition_parallel import run_chunks, prefix_length, resolve_workers
+from coalition_search import search_top_k
+from historical_index import HistoricalIndex
+from party_registry import canonical_names, coalition_mask, expanded_mask, has_lineage, mask_names, popcount
 
 # -------------------------------
 # Ideological spectrum
@@ -65,7 +72,8 @@ def load_data():
     ek_75_new = pd.read_csv('../data/zetelverdeling/zetel-data/ek_zetels75_1956-2023_filled.csv')
     ek_zetels = pd.concat([ek_50_old, ek_75_new], ignore_index=True)
 
-    kabinetten['Partijen'] = kabinetten['Partijen'].dropna().str.split(', ')
+    # Cabinet party names as used in the model (e.g. ChristenUnie -> CU, D'66 -> D66)
+    kabinetten['Partijen'] = kabinetten['Partijen'].dropna().str.split(', ').apply(canonical_names)
 
     with open("../methods/topic_vectors.json", "r") as f:
         json_ready_vectors = json.load(f)
@@ -73,19 +81,22 @@ def load_data():
     # Convert lists back to NumPy arrays
     topic_vectors = {k: np.array(v) for k, v in json_ready_vectors.items()}
 
-    return kabinetten, zetels, ek_zetels, topic_vectors
+    # Party x party roll-call agreement (None until data/api/voting_agreement.json is built)
+    voting_agreement = load_voting_agreement()
+
+    return kabinetten, zetels, ek_zetels, topic_vectors, voting_agreement
 
 
 # -------------------------------
 # Build historical coalition frequency model
 # -------------------------------
-def build_coalition_frequency(kabinetten):
-    coalition_counter = Counter()
-    for partijen in kabinetten['Partijen'].dropna():
-        for r in range(2, len(partijen) + 1):
-            for combo in combinations(sorted(partijen), r):
-                coalition_counter[combo] += 1
-    return coalition_counter
+def build_coalition_frequency(kabinetten, as_of=None, half_life=None):
+    """Count every party combination in the cabinets that took office up to ``as_of`` (default: all).
+
+    With ``half_life`` (in years) older cabinets count less. For several
+    cutoffs, build one HistoricalIndex(kabinetten) and call .counter(as_of).
+    """
+    return HistoricalIndex(kabinetten, half_life).counter(as_of, decayed=half_life is not None)
 
 
 # -------------------------------
@@ -159,40 +170,30 @@ def is_unrealistic_combo(parties):
 # -------------------------------
 # Define new parties
 # -------------------------------
-PARTY_LINEAGE = {
-    "GL/PvdA": ["GL", "PvdA"],  # Merged parties
-    "NSC": ["CDA"],             # NSC is a breakaway from CDA
-    "JA21": ["FvD"],            # JA21 split from FvD
-    # Add other mappings if necessary
-}
-
-def expand_party(party):
-    """Return historical equivalents for a party (e.g., GL/PvdA -> [GL, PvdA])"""
-    return PARTY_LINEAGE.get(party, [party])
+# Lineage (GL/PvdA -> GL + PvdA, NSC <- CDA, JA21 <- FvD) and all party
+# spellings live in party_registry.PARTIES; coalitions are compared as bitmasks.
 
 def get_expanded_coalition(combo):
     """Expand a coalition to include historical equivalents"""
-    expanded = set()
-    for party in combo:
-        expanded.update(expand_party(party))
-    return expanded
+    return set(mask_names(expanded_mask(tuple(combo))))
 
 def calculate_historical_score(combo, coalition_counter, seat_distribution):
     """Compute adjusted historical overlap score using lineage info and seat scaling"""
-    expanded_combo = get_expanded_coalition(combo)
+    expanded_combo = expanded_mask(tuple(combo))
+    lineage_match = any(has_lineage(party) for party in combo)
 
     score = 0
     total_weight = 0  # To keep track of the total weight for normalization
     
     for historical_coalition in coalition_counter:
-        overlap = expanded_combo & set(historical_coalition)
+        overlap = popcount(expanded_combo & coalition_mask(historical_coalition))
         
-        if len(overlap) >= 2:  # If there's enough overlap
+        if overlap >= 2:  # If there's enough overlap
             # Calculate overlap score: how much overlap, divided by the total length of the coalition
-            overlap_score = len(overlap) / len(historical_coalition)
+            overlap_score = overlap / len(historical_coalition)
             
             # Check if it's a lineage-based match (partial weight) or direct match (full weight)
-            if any(party in PARTY_LINEAGE for party in combo):
+            if lineage_match:
                 # If it's from a different lineage, give partial weight
                 overlap_score *= 0.5  # Apply 50% weight for lineage-based matches
             
@@ -244,25 +245,138 @@ def mean_jsd_for_coalition(coalition, topic_vectors):
     return np.mean(jsd_values) if jsd_values else 0.0
 
 
+def mean_voting_agreement(coalition, voting_agreement):
+    """Compute mean roll-call voting agreement for a set of parties"""
+    if voting_agreement is None or len(coalition) < 2:
+        return 0.0
+
+    values = []
+    for p1, p2 in combinations(coalition, 2):
+        if p1 in voting_agreement.index and p2 in voting_agreement.columns:
+            agreement = voting_agreement.at[p1, p2]
+            if not np.isnan(agreement):
+                values.append(agreement)
+    return np.mean(values) if values else 0.0
+
+
 # -------------------------------
-# Main prediction function
+# Score a single coalition
+# -------------------------------
+def score_to_percentage(score):
+    """Map a raw coalition score onto the 0-100 scale."""
+    # Given a fixed score range
+    min_score = -6
+    max_score = 4.51
+
+    # Calculate percentage
+    final_score = (score - min_score) / (max_score - min_score) * 100
+    return max(0, min(100, final_score))
+
+
+def coalition_terms(combo, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors=None, voting_agreement=None):
+    """Score components of one coalition that do not depend on its seat total.
+
+    'score' is the raw score without the surplus penalty. The historical
+    score takes seat weights, but they cancel out in its normalisation.
+    """
+    ek_score, ek_total_seats = calculate_ek_alignment_score(combo, ek_seat_dist, majority_threshold=38)
+
+    # Calculate historical score with lineage adjustments and seat scaling
+    historical_score = calculate_historical_score(combo, coalition_counter, seat_distribution)
+    
+    # Calculate ideology score
+    ideology_score = ideological_distance(combo)
+
+    # Apply penalty for party count
+    party_penalty = max(0, len(combo) - 4) * 2
+
+    jsd_penalty = mean_jsd_for_coalition(combo, topic_vectors)
+
+    # Share of motions on which the parties voted the same way
+    voting_score = mean_voting_agreement(combo, voting_agreement)
+
+    score = (
+        (historical_score * 2)
+        - (ideology_score * 2)
+        + (ek_score * 0.25)  # new EK weight
+        - 10 * jsd_penalty
+        + voting_score
+        - (party_penalty * 2)
+    )
+
+    return {
+        "historical_score": historical_score,
+        "ideology_score": ideology_score,
+        "ek_score": ek_score,
+        "ek_total_seats": ek_total_seats,
+        "jsd_penalty": jsd_penalty,
+        "voting_score": voting_score,
+        "party_penalty": party_penalty,
+        "score": score,
+    }
+
+
+def seat_surplus_penalty(seats):
+    """Penalty for every seat above a comfortable majority of 90."""
+    return max(0, seats - 90) * 0.5
+
+
+def score_coalition(combo, seats, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors=None, voting_agreement=None):
+    """Compute all score components and the final score for one coalition."""
+    terms = coalition_terms(combo, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors, voting_agreement)
+
+    # Final score computation
+    surplus_penalty = seat_surplus_penalty(seats)
+    final_score = score_to_percentage(terms["score"] - surplus_penalty)
+
+    return {
+        "coalition": combo,
+        "seats": seats,
+        "historical_score": round(terms["historical_score"], 2),
+        "ideology_score": round(terms["ideology_score"], 2),
+        "ek_score": round(terms["ek_score"], 2),
+        "ek_total_seats": terms["ek_total_seats"],
+        "jsd_penalty": round(terms["jsd_penalty"], 2),
+        "voting_score": round(terms["voting_score"], 2),
+        "party_penalty": round(terms["party_penalty"], 2),
+        "surplus_penalty": round(surplus_penalty, 2),
+        "final_score": round(final_score, 1)
+    }
+
+
 # -------------------------------
-def predict_coalitions(seat_distribution, coalition_counter, ek_zetels, Jaar, threshold=76, top_k=5, topic_vectors=None):
-    """ Predict potential coalitions based on seat distribution and historical data."""
+# Enumerate the coalition space (optionally one chunk of it)
+# -------------------------------
+def enumerate_coalitions(seat_distribution, coalition_counter, ek_seat_dist, threshold=76, topic_vectors=None, voting_agreement=None, prefix=None):
+    """Score every valid coalition, in the order of combinations() over all sizes.
+
+    prefix=(n_fixed, mask) restricts the enumeration to coalitions whose
+    membership of the first n_fixed parties equals the bits of mask; the
+    2**n_fixed masks partition the coalition space into disjoint chunks.
+    Results are (order, coalition) pairs, where order is (size, party indices).
+    """
     parties = list(seat_distribution.keys())
+    n_fixed, mask = prefix if prefix is not None else (0, 0)
+    fixed = tuple(i for i in range(n_fixed) if mask >> i & 1)
+    rest = range(n_fixed, len(parties))
 
-    # ✅ Get Eerste Kamer seat distribution for the given year
-    ek_year_data = ek_zetels[ek_zetels['Jaar'] == Jaar].copy() 
-    ek_seat_dist = dict(zip(ek_year_data['Partij'], ek_year_data['Zetels']))
+    # -------------------------------
+    # Check if the coalition includes the largest party (comment if opposition coalition)
+    largest_party = max(seat_distribution.items(), key=lambda x: x[1])[0]
+    # -------------------------------
 
     valid_coalitions = []
 
     for r in range(1, len(parties) + 1):
-        for combo in combinations(parties, r):
+        r_rest = r - len(fixed)
+        if r_rest < 0 or r_rest > len(rest):
+            continue
+        for tail in combinations(rest, r_rest):
+            indices = fixed + tail
+            combo = tuple(parties[i] for i in indices)
 
             # -------------------------------
             # Check if the coalition includes the largest party (comment if opposition coalition)
-            largest_party = max(seat_distribution.items(), key=lambda x: x[1])[0]
             if largest_party not in combo:
                 continue  # Skip coalitions that don't include the largest party 
             # -------------------------------
@@ -278,58 +392,296 @@ def predict_coalitions(seat_distribution, coalition_counter, ek_zetels, Jaar, th
                 if is_unrealistic_combo(combo):
                     continue
 
-                ek_year_data['party'] = ek_year_data['Partij']
-                ek_seat_dist = dict(zip(ek_year_data['Partij'], ek_year_data['Zetels']))
+                result = score_coalition(combo, seats, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors, voting_agreement)
+                valid_coalitions.append(((r, indices), result))
 
-                ek_score, ek_total_seats = calculate_ek_alignment_score(combo, ek_seat_dist, majority_threshold=38)
+    return valid_coalitions
 
-                # Calculate historical score with lineage adjustments and seat scaling
-                historical_score = calculate_historical_score(combo, coalition_counter, seat_distribution)
-                
-                # Calculate ideology score
-                ideology_score = ideological_distance(combo)
 
-                # Apply penalties for party count and seat surplus
-                party_penalty = max(0, len(combo) - 4) * 2
-                surplus_penalty = max(0, seats - 90) * 0.5
+def ranking_key(item):
+    """Sort key: best score first, favor lower seat counts, then enumeration order."""
+    order, result = item
+    return (-result["final_score"], result["seats"], order)
 
-                jsd_penalty = mean_jsd_for_coalition(combo, topic_vectors)
 
-                # Final score computation
-                score = (
-                    (historical_score * 2)
-                    - (ideology_score * 2)
-                    + (ek_score * 0.25)  # new EK weight
-                    - 10 * jsd_penalty
-                    - (party_penalty * 2)
-                    - surplus_penalty
-                )
+# -------------------------------
+# Branch-and-bound search (same top-k, far fewer coalitions scored)
+# -------------------------------
+class ScoreBounds:
+    """Optimistic ranking key for a partial coalition and the parties that may still join it.
+
+    Every component is bounded over all coalitions members + T (T a nonempty
+    subset of options): the ideological, JSD, party-count and surplus
+    penalties from below (closest pair, fewest parties and seats still
+    needed), EK alignment and voting agreement from above (all options
+    joined, most agreeing pair), and the historical score, a mean over
+    matching cabinets, by the best mean any set of matches could reach.
+    """
+
+    def __init__(self, parties, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors=None, voting_agreement=None):
+        self.parties = parties
+        self.seats = [seat_distribution[p] for p in parties]
+        self.ek_seat_dist = ek_seat_dist
+        self.lineage = [has_lineage(p) for p in parties]
+        n = len(parties)
+
+        # Pairwise component tables; the diagonal never wins a min/max
+        self.ideology_2d = np.full((n, n), np.inf)
+        self.ideology_4d = np.full((n, n), np.inf)
+        self.jsd = np.full((n, n), np.inf)
+        self.agreement = np.full((n, n), -np.inf)
+        for i, j in combinations(range(n), 2):
+            p1, p2 = parties[i], parties[j]
+            a, b = IDEOLOGY_2D_MAP.get(p1, (0.0, 0.0)), IDEOLOGY_2D_MAP.get(p2, (0.0, 0.0))
+            self.ideology_2d[i, j] = self.ideology_2d[j, i] = math.sqrt((a[0] - b[0])**2 + (a[1] - b[1])**2)
+            a, b = IDEOLOGY_4D_MAP.get(p1, (0.0,) * 4), IDEOLOGY_4D_MAP.get(p2, (0.0,) * 4)
+            self.ideology_4d[i, j] = self.ideology_4d[j, i] = math.sqrt(sum((a[k] - b[k])**2 for k in range(4)))
+            v1 = topic_vectors.get(p1) if topic_vectors is not None else None
+            v2 = topic_vectors.get(p2) if topic_vectors is not None else None
+            if v1 is not None and v2 is not None:
+                self.jsd[i, j] = self.jsd[j, i] = jensenshannon(v1, v2, base=2)
+            if voting_agreement is not None and p1 in voting_agreement.index and p2 in voting_agreement.columns:
+                agreement = voting_agreement.at[p1, p2]
+                if not np.isnan(agreement):
+                    self.agreement[i, j] = self.agreement[j, i] = agreement
+        self.has_vector = [topic_vectors is not None and topic_vectors.get(p) is not None for p in parties]
+
+        # Historical cabinets and expanded parties as 0/1 rows over party ids
+        history = list(coalition_counter)
+        masks = [coalition_mask(h) for h in history]
+        expanded = [expanded_mask((p,)) for p in parties]
+        bits = max([m.bit_length() for m in masks + expanded] + [1])
+        self.history_bits = np.array([[m >> b & 1 for b in range(bits)] for m in masks], dtype=np.int64).reshape(len(masks), bits)
+        self.expanded_bits = np.array([[m >> b & 1 for b in range(bits)] for m in expanded], dtype=np.int64).reshape(n, bits)
+        self.history_weight = np.array([coalition_counter[h] / len(h) for h in history], dtype=float)
+
+    def historical_bound(self, members, union):
+        """Largest mean overlap score over the matches of any coalition between members and union."""
+        overlap_min = self.history_bits @ self.expanded_bits[list(members)].max(axis=0)
+        overlap_max = self.history_bits @ self.expanded_bits[list(union)].max(axis=0)
+        best = self.history_weight * overlap_max
+        forced = overlap_min >= 2  # matched by every coalition in the subtree
+        total, matches = best[forced].sum(), int(forced.sum())
+        for value in np.sort(best[~forced & (overlap_max >= 2)])[::-1]:
+            if matches and value <= total / matches:
+                break
+            total += value
+            matches += 1
+        score = total / matches if matches else 0.0
+        # Every coalition with a lineage party gets half weight
+        return score * 0.5 if any(self.lineage[i] for i in members) else score
+
+    def optimistic_key(self, members, options, threshold):
+        """Lower bound on ranking_key in the subtree; with no options, for the coalition members itself."""
+        union = list(members) + list(options)
+        upper = np.triu_indices(len(union), k=1)
+        pairs = tuple(np.array(union)[index] for index in upper)
+        member_seats = sum(self.seats[i] for i in members)
+
+        if options:
+            # Fewest parties and seats any coalition in the subtree can have
+            option_seats = sorted((self.seats[i] for i in options), reverse=True)
+            needed = 1
+            while needed < len(option_seats) and member_seats + sum(option_seats[:needed]) < threshold:
+                needed += 1
+            min_seats = max(threshold, member_seats + option_seats[-1])
+
+            # Closest and most agreeing pair
+            ideology_score = self.ideology_2d[pairs].min() * 0.5 + self.ideology_4d[pairs].min() * 0.5
+            jsd_penalty = self.jsd[pairs].min() if all(self.has_vector[i] for i in union) else 0.0
+            voting_score = max(0.0, self.agreement[pairs].max())
+        else:
+            # The coalition itself: the same means as score_coalition
+            needed, min_seats = 0, member_seats
+            ideology_score = self.ideology_2d[pairs].mean() * 0.5 + self.ideology_4d[pairs].mean() * 0.5 if len(union) > 1 else 0.0
+            jsd = self.jsd[pairs][np.isfinite(self.jsd[pairs])]
+            jsd_penalty = jsd.mean() if len(jsd) else 0.0
+            agreement = self.agreement[pairs][np.isfinite(self.agreement[pairs])]
+            voting_score = agreement.mean() if len(agreement) else 0.0
+
+        ek_score, _ = calculate_ek_alignment_score(tuple(self.parties[i] for i in union), self.ek_seat_dist, majority_threshold=38)
+        historical_score = self.historical_bound(members, union)
+        party_penalty = max(0, len(members) + needed - 4) * 2
+        surplus_penalty = max(0, min_seats - 90) * 0.5
+
+        score = (
+            (historical_score * 2)
+            - (ideology_score * 2)
+            + (ek_score * 0.25)
+            - 10 * jsd_penalty
+            + voting_score
+            - (party_penalty * 2)
+            - surplus_penalty
+        )
+        # Slack for rounding differences with score_coalition's own arithmetic
+        final_score = round(score_to_percentage(score + 1e-9), 1)
+        if options:
+            return (-final_score, min_seats, (len(members) + needed,))
+        return (-final_score, member_seats, (len(members), tuple(members)))
+
+
+def search_coalitions(seat_distribution, coalition_counter, ek_seat_dist, threshold=76, top_k=5, topic_vectors=None, voting_agreement=None, prefix=None):
+    """The top_k of enumerate_coalitions (same prefix chunks), found by branch and bound."""
+    parties = list(seat_distribution.keys())
+    n_fixed, mask = prefix if prefix is not None else (0, 0)
+    fixed = tuple(i for i in range(n_fixed) if mask >> i & 1)
+    # Zero seat parties are skipped, as in enumerate_coalitions
+    options = tuple(i for i in range(n_fixed, len(parties)) if seat_distribution[parties[i]] > 0)
+
+    conflicts = {i: {j for j in range(len(parties)) if j != i and is_unrealistic_combo((parties[i], parties[j]))}
+                 for i in range(len(parties))}
+    bounds = ScoreBounds(parties, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors, voting_agreement)
+
+    # -------------------------------
+    # Check if the coalition includes the largest party (comment if opposition coalition)
+    largest_party = max(seat_distribution.items(), key=lambda x: x[1])[0]
+    required = parties.index(largest_party)
+    # -------------------------------
+
+    def evaluate(indices):
+        combo = tuple(parties[i] for i in indices)
+        if any(seat_distribution[p] == 0 for p in combo) or is_unrealistic_combo(combo):
+            return None
+        seats = sum(seat_distribution[p] for p in combo)
+        result = score_coalition(combo, seats, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors, voting_agreement)
+        return (len(indices), indices), result
+
+    return search_top_k([seat_distribution[p] for p in parties], threshold, top_k, ranking_key, evaluate,
+                        lambda members, options: bounds.optimistic_key(members, options, threshold),
+                        conflicts, fixed, options, required)
 
-                # Given a fixed score range
-                min_score = -6
-                max_score = 4.51
 
-                # Calculate percentage
-                final_score = (score - min_score) / (max_score - min_score) * 100
-                final_score = max(0, min(100, final_score))
+# -------------------------------
+# Main prediction function
+# -------------------------------
+def predict_coalitions(seat_distribution, coalition_counter, ek_zetels, Jaar, threshold=76, top_k=5, topic_vectors=None, voting_agreement=None, workers=1, search="branch_and_bound"):
+    """ Predict potential coalitions based on seat distribution and historical data.
 
+    With workers > 1 (or workers="all" / -1 for one per core) the coalition
+    space is split by the membership pattern of the first few parties and
+    scored in forked worker processes; the merged top-k is identical to the
+    serial result.
 
-                valid_coalitions.append({
-                    "coalition": combo,
-                    "seats": seats,
-                    "historical_score": round(historical_score, 2),
-                    "ideology_score": round(ideology_score, 2),
-                    "ek_score": round(ek_score, 2),
-                    "ek_total_seats": ek_total_seats,
-                    "jsd_penalty": round(jsd_penalty, 2),
-                    "party_penalty": round(party_penalty, 2),
-                    "surplus_penalty": round(surplus_penalty, 2),
-                    "final_score": round(final_score, 1)
-                })
+    search="branch_and_bound" only scores coalitions whose score bound can
+    still reach the top-k; search="exhaustive" scores every coalition. Both
+    return the same list.
+    """
+    if search not in ("branch_and_bound", "exhaustive"):
+        raise ValueError(f"Unknown search mode: {search}")
 
+    # ✅ Get Eerste Kamer seat distribution for the given year
+    ek_year_data = ek_zetels[ek_zetels['Jaar'] == Jaar]
+    ek_seat_dist = dict(zip(ek_year_data['Partij'], ek_year_data['Zetels']))
+
+    def score_chunk(prefix):
+        if search == "branch_and_bound":
+            return search_coalitions(seat_distribution, coalition_counter, ek_seat_dist, threshold, top_k,
+                                     topic_vectors, voting_agreement, prefix)
+        results = enumerate_coalitions(seat_distribution, coalition_counter, ek_seat_dist, threshold,
+                                       topic_vectors, voting_agreement, prefix)
+        return heapq.nsmallest(top_k, results, key=ranking_key)
 
+    workers = resolve_workers(workers)
+    if workers > 1:
+        n_fixed = prefix_length(len(seat_distribution), workers)
+        chunks = [(n_fixed, mask) for mask in range(1 << n_fixed)]
+        best = run_chunks(score_chunk, chunks, workers, top_k, ranking_key)
+    else:
+        best = score_chunk(None)
 
-    valid_coalitions.sort(key=lambda x: (-x["final_score"], x["seats"]))  # Favor lower seat counts
-    return valid_coalitions[:top_k]
+    return [result for _, result in best]
 
 
+# -------------------------------
+# Rank stability of the predicted coalitions
+# -------------------------------
+def rank_stability(predictions, seat_distribution, coalition_counter, ek_zetels, Jaar, threshold=76, topic_vectors=None, voting_agreement=None, max_shift=30):
+    """Add seat-shift thresholds to each predicted coalition (key 'stability').
+
+    For every party, the smallest gain and loss (in seats, other parties
+    unchanged) at which the coalition becomes infeasible or changes rank
+    among all coalitions. Only the seats and the surplus penalty of a
+    coalition depend on the seat distribution (the seat weights of the
+    historical score cancel out: total * W / (matches * W)), so the other
+    terms are computed once for every coalition a shift can make feasible.
+    A shift then updates the seats and feasibility of the coalitions with
+    the shifted party, and ranks them against the unchanged keys of the rest.
+    """
+    parties = list(seat_distribution.keys())
+    ek_year_data = ek_zetels[ek_zetels['Jaar'] == Jaar]
+    ek_seat_dist = dict(zip(ek_year_data['Partij'], ek_year_data['Zetels']))
+
+    # Seat-independent score, enumeration order, seats and zero seat parties
+    # per coalition, for every coalition at most max_shift seats short (with
+    # at most one zero seat party, which a gain can bring in)
+    terms = {}
+    for r in range(1, len(parties) + 1):
+        for indices in combinations(range(len(parties)), r):
+            combo = tuple(parties[i] for i in indices)
+            seats = sum(seat_distribution[p] for p in combo)
+            zeros = sum(seat_distribution[p] == 0 for p in combo)
+            if seats + max_shift < threshold or zeros > 1 or is_unrealistic_combo(combo):
+                continue
+            score = coalition_terms(combo, seat_distribution, coalition_counter, ek_seat_dist, topic_vectors, voting_agreement)["score"]
+            terms[frozenset(combo)] = ((r, indices), score, seats, zeros)
+    with_party = {party: [members for members in terms if party in members] for party in parties}
+    combos = [frozenset(p["coalition"]) for p in predictions]
+
+    def key(members, seats, zeros, largest):
+        """ranking_key of a coalition with these seats, or None if it is not feasible."""
+        if zeros or seats < threshold:
+            return None
+        # -------------------------------
+        # Check if the coalition includes the largest party (comment if opposition coalition)
+        if largest not in members:
+            return None
+        # -------------------------------
+        order, score, _, _ = terms[members]
+        return (-round(score_to_percentage(score - seat_surplus_penalty(seats)), 1), seats, order)
+
+    others = {}  # (party, largest party) -> sorted keys of the coalitions without the party
+
+    def standings(party, shift):
+        """Rank (1-based, None if infeasible) of each predicted coalition after shifting one party."""
+        shifted = dict(seat_distribution, **{party: seat_distribution[party] + shift})
+        largest = max(shifted.items(), key=lambda x: x[1])[0]
+        if (party, largest) not in others:
+            keys = (key(members, seats, zeros, largest) for members, (_, _, seats, zeros) in terms.items() if party not in members)
+            others[(party, largest)] = sorted(k for k in keys if k is not None)
+        rest = others[(party, largest)]
+
+        # The shifted party's seats, and whether it is a zero seat party, change
+        zero_change = (shifted[party] == 0) - (seat_distribution[party] == 0)
+        moved = {}
+        for members in with_party[party]:
+            _, _, seats, zeros = terms[members]
+            moved[members] = key(members, seats + shift, zeros + zero_change, largest)
+        ranked = sorted(k for k in moved.values() if k is not None)
+
+        status = []
+        for members in combos:
+            k = moved[members] if members in moved else key(members, *terms[members][2:], largest)
+            status.append(None if k is None else bisect_left(rest, k) + bisect_left(ranked, k) + 1)
+        return status
+
+    base = standings(parties[0], 0)
+    bands = [[] for _ in combos]
+    for party in parties:
+        events = [{} for _ in combos]
+        for direction, limit in (("gain", max_shift), ("loss", seat_distribution[party])):
+            sign = 1 if direction == "gain" else -1
+            for shift in range(1, limit + 1):
+                status = standings(party, sign * shift)
+                for i, rank in enumerate(status):
+                    if direction not in events[i] and rank != base[i]:
+                        events[i][direction] = shift
+                        events[i][f"{direction}_rank"] = rank
+                if all(direction in ev for ev in events):
+                    break
+        for i, ev in enumerate(events):
+            if ev:
+                bands[i].append({"party": party, **ev})
+
+    for p, band in zip(predictions, bands):
+        p["stability"] = band
+    return predictions
@@ -0,0 +1,92 @@
+import os
+import heapq
+import queue
+import traceback
+import multiprocessing as mp
+
+# -------------------------------
+# Multi-core helpers for coalition enumeration
+# -------------------------------
+# Workers are forked, so they share the already loaded model tables (cabinets,
+# EK seats, topic vectors, ...) with the parent without pickling them, and the
+# chunk function may be a closure defined in a %run script or notebook.
+# Only the chunk ids and the (small) per-worker top-k lists cross processes.
+
+
+def default_workers():
+    """Number of worker processes to use when 'all cores' is requested."""
+    return os.cpu_count() or 1
+
+
+def resolve_workers(workers):
+    """workers="all" or -1 means one worker per core; anything else is taken as a count."""
+    if workers == "all" or workers == -1:
+        return default_workers()
+    return int(workers)
+
+
+def prefix_length(n_parties, workers, chunks_per_worker=4):
+    """Number of leading parties whose membership pattern defines a chunk."""
+    length = 0
+    while (1 << length) < workers * chunks_per_worker and length < n_parties:
+        length += 1
+    return length
+
+
+def merge_top_k(result_lists, top_k, key):
+    """Merge per-chunk results into the overall top-k (deterministic for a total-order key)."""
+    return heapq.nsmallest(top_k, (r for results in result_lists for r in results), key=key)
+
+
+def _worker(chunk_fn, tasks, results, top_k, key):
+    try:
+        best = []
+        for chunk in iter(tasks.get, None):
+            best = merge_top_k([best, chunk_fn(chunk)], top_k, key)
+        results.put(("ok", best))
+    except Exception:
+        results.put(("error", traceback.format_exc()))
+
+
+def run_chunks(chunk_fn, chunks, workers, top_k, key):
+    """Apply chunk_fn to every chunk in forked workers and return the merged top-k.
+
+    chunk_fn(chunk) returns a list of results; key must be a total order
+    so that the merged output does not depend on how chunks were scheduled.
+    """
+    ctx = mp.get_context("fork")
+    tasks, results = ctx.Queue(), ctx.Queue()
+    for chunk in chunks:
+        tasks.put(chunk)
+
+    workers = max(1, min(workers, len(chunks)))
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [
+        ctx.Process(target=_worker, args=(chunk_fn, tasks, results, top_k, key), daemon=True)
+        for _ in range(workers)
+    ]
+    for p in processes:
+        p.start()
+
+    # Collect before joining so a full result pipe can't block the workers.
+    # A worker killed before it posts a result (OOM, signal) would leave
+    # results.get() waiting forever, so poll and check the exit codes.
+    collected = []
+    while len(collected) < len(processes):
+        try:
+            collected.append(results.get(timeout=1))
+        except queue.Empty:
+            dead = [p.exitcode for p in processes if p.exitcode not in (None, 0)]
+            if dead:
+                for p in processes:
+                    p.kill()
+                raise RuntimeError(f"Coalition worker exited with code {dead[0]} without a result")
+    for p in processes:
+        p.join()
+
+    errors = [payload for status, payload in collected if status == "error"]
+    if errors:
+        raise RuntimeError("Coalition worker failed:\n" + errors[0])
+    return merge_top_k([payload for _, payload in collected], top_k, key)
@@ -0,0 +1,93 @@
+import math
+import heapq
+import itertools
+from bisect import insort
+
+# -------------------------------
+# Exact top-k coalition search (best-first branch and bound)
+# -------------------------------
+# Coalitions are built by adding parties in index order, so every coalition
+# has exactly one place in the search tree: a node is a tuple of increasing
+# party indices (members) plus the later parties that may still join it
+# (options), and its subtree holds every coalition that adds one or more of
+# those options.
+#
+# For every node the model gives an optimistic ranking key: a key no
+# coalition in the subtree can beat (best reachable score, then fewest seats,
+# then fewest parties). Nodes are expanded best key first, and a node whose
+# optimistic key is already worse than the k-th best key found so far is
+# dropped with its whole subtree. Because the comparison uses the full key,
+# including the seat and enumeration-order tie-breaks, the result is identical
+# to scoring every coalition and taking the k smallest keys.
+
+
+def search_top_k(seats, threshold, top_k, key, evaluate, optimistic_key, conflicts, fixed=(), options=(), required=None):
+    """Best top_k (order, result) pairs, equal to heapq.nsmallest(top_k, all_coalitions, key).
+
+    seats: seat count per party index
+    evaluate(members): (order, result) for a coalition of party indices, or
+        None when it is not a valid coalition
+    optimistic_key(members, options): lower bound on key(item) of members
+        plus any nonempty subset of options (members is never empty); with
+        options=() of the coalition members itself, so that coalitions that
+        cannot enter the top-k are not evaluated at all
+    conflicts: party index -> set of indices it never forms a coalition with
+    fixed, options: parties that are always in / may be in every coalition
+        (a prefix chunk as in enumerate_coalitions, or () and all parties)
+    required: party index every coalition has to contain (None: no such party)
+    """
+    if top_k <= 0:
+        return []
+    best = []  # (key, item), sorted
+    tie = itertools.count()
+
+    def beaten(bound):
+        """True if nothing with this optimistic key can enter the current top-k."""
+        return len(best) == top_k and bound > best[-1][0]
+
+    def consider(members):
+        if sum(seats[i] for i in members) < threshold:
+            return
+        if required is not None and required not in members:
+            return
+        if beaten(optimistic_key(members, ())):
+            return
+        item = evaluate(members)
+        if item is None:
+            return
+        entry = (key(item), item)
+        if len(best) < top_k or entry[0] < best[-1][0]:
+            insort(best, entry, key=lambda e: e[0])
+            del best[top_k:]
+
+    frontier = []
+
+    def push(members, options):
+        if not options:
+            return
+        if required is not None and required not in members and required not in options:
+            return
+        if sum(seats[i] for i in members) + sum(seats[i] for i in options) < threshold:
+            return
+        bound = optimistic_key(members, options) if members else (-math.inf,)
+        if not beaten(bound):
+            heapq.heappush(frontier, (bound, next(tie), members, options))
+
+    fixed = tuple(fixed)
+    if any(j in conflicts[i] for i in fixed for j in fixed):
+        return []
+    options = tuple(o for o in options if not any(o in conflicts[i] for i in fixed))
+    if fixed:
+        consider(fixed)
+    push(fixed, options)
+
+    while frontier:
+        bound, _, members, options = heapq.heappop(frontier)
+        if beaten(bound):
+            break  # every remaining node has an equal or worse bound
+        for n, party in enumerate(options):
+            child = members + (party,)
+            consider(child)
+            push(child, tuple(o for o in options[n + 1:] if o not in conflicts[party]))
+
+    return [item for _, item in best]
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import glob
+import io
+import time
+import runpy
+import tarfile
+import inspect
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+import pandas as pd
+from party_registry import canonical
+
+# -------------------------------
+# Golden-output harness for predict_coalitions
+# -------------------------------
+# Runs a reference and a candidate model script on the same seat
+# distributions and reports every difference in the top-k: a different
+# coalition at some rank (split into real reorderings and different
+# tie-breaking between coalitions with the same final score), a score
+# component outside the tolerance, and the time each engine needed.
+#
+# Engines are model scripts loaded with runpy (as the notebook's %run does);
+# "git:<rev>" takes the candidate's file as it was at that revision, so
+#
+#     python golden_harness.py coalition-calculations-no-biggest-party.py
+#
+# compares the working copy against HEAD. The helper modules the reference
+# imports (coalition_search, party_registry, ...) come from the same
+# revision; the data files are the current ones. Options for one engine
+# only, e.g. a keyword the reference does not have yet, go in
+# --reference-kwargs / --candidate-kwargs as a JSON object.
+# Everything runs offline from the files in the repository.
+
+COALITION_DIR = "coalitions"
+ELECTIONS_FILE = "../data/zetelverdeling/zetel-data/verkiezingsuitslag/Historische_zetelverdeling_Tweede_Kamer_2002-2023.csv"
+POLL_YEAR = 2025
+
+# Parties drawn for the random cases (the ones the model has positions for)
+RANDOM_PARTIES = ["PVV", "GL/PvdA", "VVD", "NSC", "D66", "BBB", "CDA", "SP", "DENK",
+                  "PvdD", "FvD", "SGP", "CU", "Volt", "JA21", "50PLUS", "BIJ1"]
+
+
+# -------------------------------
+# Test cases: (name, seat_distribution, Jaar)
+# -------------------------------
+def stored_polls(coalition_dir=COALITION_DIR):
+    cases = []
+    for path in sorted(glob.glob(os.path.join(coalition_dir, "verdeling-*.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            seats = json.load(f)
+        cases.append((os.path.basename(path)[len("verdeling-"):-len(".json")], seats, POLL_YEAR))
+    return cases
+
+
+def historical_elections(path=ELECTIONS_FILE):
+    table = pd.read_csv(path).set_index("Partij").drop(index="Totaal", errors="ignore")
+    cases = []
+    for year in table.columns:
+        column = table[year].dropna()
+        seats = {canonical(p): int(n) for p, n in column.sort_values(ascending=False).items() if n > 0}
+        cases.append((f"verkiezing-{year}", seats, int(year)))
+    return cases
+
+
+def random_distributions(n, seed=0, parties=RANDOM_PARTIES):
+    """Seeded random 150-seat distributions over 8 to all parties, with some zero-seat parties."""
+    rng = np.random.default_rng(seed)
+    cases = []
+    for i in range(n):
+        chosen = rng.choice(parties, size=rng.integers(8, len(parties) + 1), replace=False)
+        shares = rng.dirichlet(np.full(len(chosen), 0.8))
+        counts = rng.multinomial(150, shares)
+        seats = dict(sorted(zip(chosen.tolist(), counts.tolist()), key=lambda x: -x[1]))
+        cases.append((f"random-{seed}-{i}", seats, POLL_YEAR))
+    return cases
+
+
+# -------------------------------
+# Engines
+# -------------------------------
+def _script_at(spec, default_path, tmp_dir):
+    """Path of an engine script; for 'git:<rev>' or 'git:<rev>:<path>' the script's
+    directory at that revision is extracted into tmp_dir, helper modules included."""
+    if not spec.startswith("git:"):
+        return spec
+    _, rev, *path = spec.split(":", 2)
+    path = path[0] if path else default_path
+    relative = os.path.relpath(os.path.abspath(path), _git_root())
+    archive = subprocess.run(["git", "archive", rev, os.path.dirname(relative) or "."],
+                             cwd=_git_root(), capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(tmp_dir, filter="data")
+    return os.path.join(tmp_dir, relative)
+
+
+def _git_root():
+    return subprocess.run(["git", "rev-parse", "--show-toplevel"], capture_output=True, check=True, text=True).stdout.strip()
+
+
+def _run_script(path):
+    """runpy.run_path with the helper modules imported from the script's own directory.
+
+    Modules of another engine that are already imported are set aside first,
+    so the reference and the candidate each keep their own versions.
+    """
+    module_dir = os.path.dirname(os.path.abspath(path))
+    local = {os.path.splitext(os.path.basename(p))[0] for p in glob.glob(os.path.join(module_dir, "*.py"))}
+    saved_modules = {name: sys.modules.pop(name) for name in local if name in sys.modules}
+    saved_path = list(sys.path)
+    sys.path.insert(0, module_dir)
+    try:
+        return runpy.run_path(path)
+    finally:
+        sys.path[:] = saved_path
+        for name in local:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved_modules)
+
+
+class Engine:
+    """A model script with its data loaded once, and the options only this engine gets."""
+
+    def __init__(self, label, path, options=None):
+        self.label = label
+        self.path = path
+        self.options = options or {}
+        self.module = _run_script(path)
+        loaded = self.module["load_data"]()
+        self.kabinetten, self.zetels, self.ek_zetels, self.topic_vectors = loaded[:4]
+        self.voting_agreement = loaded[4] if len(loaded) > 4 else None
+        self.coalition_counter = self.module["build_coalition_frequency"](self.kabinetten)
+        self._accepts = set(inspect.signature(self.module["predict_coalitions"]).parameters)
+        unknown = set(self.options) - self._accepts
+        if unknown:
+            raise ValueError(f"{label} predict_coalitions does not take {', '.join(sorted(unknown))}")
+
+    def predict(self, seat_distribution, Jaar, top_k, **kwargs):
+        options = {"threshold": 76, "top_k": top_k, "topic_vectors": self.topic_vectors,
+                   "voting_agreement": self.voting_agreement, **kwargs, **self.options}
+        options = {k: v for k, v in options.items() if k in self._accepts}
+        return self.module["predict_coalitions"](seat_distribution, self.coalition_counter,
+                                                 ek_zetels=self.ek_zetels, Jaar=Jaar, **options)
+
+
+# -------------------------------
+# Comparison
+# -------------------------------
+def _numeric(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+def compare(reference, candidate, tol=1e-9):
+    """List of differences between two prediction lists (empty when they agree)."""
+    diffs = []
+    if len(reference) != len(candidate):
+        diffs.append({"kind": "length", "reference": len(reference), "candidate": len(candidate)})
+
+    ref_keys = [frozenset(p["coalition"]) for p in reference]
+    cand_keys = [frozenset(p["coalition"]) for p in candidate]
+
+    for rank, (ref, cand) in enumerate(zip(reference, candidate), start=1):
+        if ref_keys[rank - 1] != cand_keys[rank - 1]:
+            # Same final score on both sides: only the tie-break (seats, then enumeration order) differs
+            tied = ref["final_score"] == cand["final_score"]
+            diffs.append({
+                "kind": "tie-break" if tied else "order",
+                "rank": rank,
+                "reference": [list(ref["coalition"]), ref["seats"], ref["final_score"]],
+                "candidate": [list(cand["coalition"]), cand["seats"], cand["final_score"]],
+            })
+            continue
+
+        if list(ref["coalition"]) != list(cand["coalition"]):
+            diffs.append({"kind": "party order", "rank": rank,
+                          "reference": list(ref["coalition"]), "candidate": list(cand["coalition"])})
+        for field in sorted(set(ref) | set(cand)):
+            if field == "coalition":
+                continue
+            if field not in ref or field not in cand:
+                diffs.append({"kind": "field", "rank": rank, "field": field,
+                              "only_in": "reference" if field in ref else "candidate"})
+            elif _numeric(ref[field]) and _numeric(cand[field]):
+                if abs(float(ref[field]) - float(cand[field])) > tol:
+                    diffs.append({"kind": "component", "rank": rank, "field": field,
+                                  "reference": float(ref[field]), "candidate": float(cand[field])})
+            elif ref[field] != cand[field]:
+                diffs.append({"kind": "component", "rank": rank, "field": field,
+                              "reference": ref[field], "candidate": cand[field]})
+    return diffs
+
+
+def run(reference, candidate, cases, top_k=7, tol=1e-9, **kwargs):
+    """Run both engines on every case; returns per-case results and the total times."""
+    results = []
+    totals = {reference.label: 0.0, candidate.label: 0.0}
+    for name, seats, Jaar in cases:
+        timings = {}
+        outputs = {}
+        for engine in (reference, candidate):
+            start = time.perf_counter()
+            outputs[engine.label] = engine.predict(dict(seats), Jaar, top_k, **kwargs)
+            timings[engine.label] = time.perf_counter() - start
+            totals[engine.label] += timings[engine.label]
+        results.append({
+            "case": name,
+            "parties": len(seats),
+            "timings": timings,
+            "diffs": compare(outputs[reference.label], outputs[candidate.label], tol),
+        })
+    return results, totals
+
+
+def report(results, totals, reference_label, candidate_label, verbose=False):
+    failed = [r for r in results if r["diffs"]]
+    for r in results:
+        if r["diffs"] or verbose:
+            ref_t, cand_t = r["timings"][reference_label], r["timings"][candidate_label]
+            status = "FAIL" if r["diffs"] else "ok"
+            print(f"{status:4} {r['case']:<40} {r['parties']:>2} parties  {ref_t:7.3f}s -> {cand_t:7.3f}s")
+        for d in r["diffs"]:
+            print("       " + json.dumps(d, ensure_ascii=False, default=str))
+
+    ref_total, cand_total = totals[reference_label], totals[candidate_label]
+    speedup = ref_total / cand_total if cand_total > 0 else float("inf")
+    print(f"\n{len(results) - len(failed)}/{len(results)} cases identical")
+    print(f"{reference_label}: {ref_total:.2f}s   {candidate_label}: {cand_total:.2f}s   speedup x{speedup:.2f}")
+    return not failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare a candidate predict_coalitions against a reference.")
+    parser.add_argument("candidate", help="model script to test")
+    parser.add_argument("--reference", default="git:HEAD", help="reference script, or git:<rev>[:<path>] (default: git:HEAD)")
+    parser.add_argument("--random", type=int, default=20, help="number of random seat distributions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top-k", type=int, default=7)
+    parser.add_argument("--tol", type=float, default=1e-9, help="absolute tolerance for score components")
+    parser.add_argument("--no-elections", action="store_true", help="skip the historical elections")
+    parser.add_argument("--workers", type=int, default=None, help="pass workers= to both engines")
+    parser.add_argument("--reference-kwargs", type=json.loads, default={}, metavar="JSON",
+                        help='extra predict_coalitions options for the reference only, e.g. \'{"search": "exhaustive"}\'')
+    parser.add_argument("--candidate-kwargs", type=json.loads, default={}, metavar="JSON",
+                        help="extra predict_coalitions options for the candidate only")
+    parser.add_argument("--quick", action="store_true", help="5 random cases and nothing above 16 parties (about half a minute)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also list the cases that agree")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="reference-") as tmp_dir:
+        reference = Engine("reference", _script_at(args.reference, args.candidate, tmp_dir), args.reference_kwargs)
+        candidate = Engine("candidate", args.candidate, args.candidate_kwargs)
+
+    cases = stored_polls()
+    if not args.no_elections:
+        cases += historical_elections()
+    cases += random_distributions(5 if args.quick else args.random, args.seed)
+    if args.quick:
+        cases = [case for case in cases if len(case[1]) <= 16]
+
+    kwargs = {"workers": args.workers} if args.workers else {}
+    results, totals = run(reference, candidate, cases, args.top_k, args.tol, **kwargs)
+    ok = report(results, totals, reference.label, candidate.label, args.verbose)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
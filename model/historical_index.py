@@ -0,0 +1,115 @@
+import math
+from collections import Counter
+from itertools import combinations
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+# Date-aware index of historical coalitions
+# -------------------------------
+# build_coalition_frequency counts every party sub-combination of every
+# cabinet. This index stores the same counts cumulatively per cabinet start
+# date (Aantreden): column j holds, for every combination, the number of
+# cabinets that took office on or before dates[j]. The frequency as of any
+# date is then one column lookup, so backtests ("as of 2017") no longer need
+# a pruned copy of the cabinet CSV.
+#
+# With a half-life, a second cumulative array holds sum(2 ** (start / half_life))
+# per combination, and the decayed count at time t is that sum times
+# 2 ** (-t / half_life): a cabinet that started one half-life before t counts 0.5.
+
+DATE_COLUMN = "Aantreden"
+
+
+def _years(dates):
+    """Dates as fractional years since 1900 (the unit of the half-life)."""
+    dates = pd.to_datetime(pd.Series(dates))
+    return ((dates - pd.Timestamp("1900-01-01")).dt.days / 365.25).to_numpy()
+
+
+class HistoricalIndex:
+    """Cumulative coalition counts by cabinet start date.
+
+    ``kabinetten`` is the cabinet table from load_data() (Partijen already
+    split into lists). Combinations are kept in the order in which
+    build_coalition_frequency would first count them.
+    """
+
+    def __init__(self, kabinetten, half_life=None):
+        cabinets = kabinetten.dropna(subset=["Partijen"]).sort_values(DATE_COLUMN, kind="stable")
+
+        self.combos = []
+        self._row = {}
+        occurrences = []  # (combination row, cabinet number)
+        for c, partijen in enumerate(cabinets["Partijen"]):
+            for r in range(2, len(partijen) + 1):
+                for combo in combinations(sorted(partijen), r):
+                    if combo not in self._row:
+                        self._row[combo] = len(self.combos)
+                        self.combos.append(combo)
+                    occurrences.append((self._row[combo], c))
+
+        # One column per distinct start date; cabinets on the same date share a column
+        starts = pd.to_datetime(cabinets[DATE_COLUMN]).to_numpy()
+        self.dates, column = np.unique(starts, return_inverse=True)
+        rows, cabinet = np.array(occurrences).T
+        counts = np.zeros((len(self.combos), len(self.dates)), dtype=np.int32)
+        np.add.at(counts, (rows, column[cabinet]), 1)
+        self.cumulative = np.cumsum(counts, axis=1)
+
+        self.half_life = half_life
+        self.decayed = None
+        if half_life is not None:
+            # Offset by the first start date so the exponents stay small
+            self._origin = _years(self.dates[:1])[0]
+            growth = np.exp2((_years(starts) - self._origin) / half_life)
+            weights = np.zeros_like(counts, dtype=float)
+            np.add.at(weights, (rows, column[cabinet]), growth[cabinet])
+            self.decayed = np.cumsum(weights, axis=1)
+
+        self._counters = {}
+
+    def _column(self, as_of):
+        """Index of the last start date on or before ``as_of`` (-1 if none; None = everything)."""
+        if as_of is None:
+            return len(self.dates) - 1
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(as_of)), side="right")) - 1
+
+    def _decay_factor(self, as_of):
+        when = pd.Timestamp(as_of) if as_of is not None else pd.Timestamp(self.dates[-1])
+        return math.exp2(-(_years([when])[0] - self._origin) / self.half_life)
+
+    def frequency(self, combo, as_of=None, decayed=False):
+        """Number of cabinets up to ``as_of`` that contained all parties in ``combo``."""
+        row = self._row.get(tuple(sorted(combo)))
+        j = self._column(as_of)
+        if row is None or j < 0:
+            return 0
+        if decayed:
+            if self.decayed is None:
+                raise ValueError("Index was built without a half_life")
+            return self.decayed[row, j] * self._decay_factor(as_of)
+        return int(self.cumulative[row, j])
+
+    def counter(self, as_of=None, decayed=False):
+        """Counter of combinations as of a date, in the form build_coalition_frequency returns.
+
+        Combinations that had not occurred yet are left out, exactly as in a
+        Counter built from the cabinets up to that date. Results are cached per
+        date column, so repeated calls for the same cutoff are free.
+        """
+        j = self._column(as_of)
+        key = (j, as_of if decayed else None, decayed)
+        if key not in self._counters:
+            if j < 0:
+                self._counters[key] = Counter()
+            elif decayed:
+                if self.decayed is None:
+                    raise ValueError("Index was built without a half_life")
+                factor = self._decay_factor(as_of)
+                counts, values = self.cumulative[:, j], self.decayed[:, j] * factor
+                self._counters[key] = Counter({combo: values[i] for i, combo in enumerate(self.combos) if counts[i] > 0})
+            else:
+                counts = self.cumulative[:, j]
+                self._counters[key] = Counter({combo: int(counts[i]) for i, combo in enumerate(self.combos) if counts[i] > 0})
+        return self._counters[key]
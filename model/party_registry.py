@@ -0,0 +1,172 @@
+from functools import lru_cache
+
+# -------------------------------
+# Party registry: one id per party, every spelling, lineage
+# -------------------------------
+# Every data source spells parties differently (cabinet table: "ChristenUnie",
+# "D'66"; polls: "GL-PvdA"; OData: "FVD"; transcripts: "PW", "Lid Omtzigt").
+# All of them resolve here to one stable integer id and the name used in the
+# model. Ids are the position in PARTIES, so new parties go at the end.
+#
+# lineage:   predecessors the model scores a party's history with
+#            (GL/PvdA -> GL + PvdA, NSC <- CDA); closed transitively below
+# successor: the party that carries on a merged party in today's data
+#            (speeches of GroenLinks and PvdA are counted as GL/PvdA)
+
+PARTIES = {
+    # Current Tweede Kamer
+    "PVV": {"aliases": ["PW", "Partij voor de Vrijheid"]},
+    "GL/PvdA": {"aliases": ["GL-PvdA", "GroenLinks-PvdA", "GroenLinks/PvdA"], "lineage": ["GL", "PvdA"]},
+    "VVD": {"aliases": ["WD", "Volkspartij voor Vrijheid en Democratie"]},
+    "NSC": {"aliases": ["Nieuw Sociaal Contract", "Lid Omtzigt", "het lid Omtzigt"], "lineage": ["CDA"]},
+    "D66": {"aliases": ["D'66", "Democraten 66"]},
+    "BBB": {"aliases": ["BoerBurgerBeweging"]},
+    "CDA": {"aliases": ["CDA (gedoogd door PVV)", "Christen-Democratisch Appèl"]},
+    "SP": {"aliases": ["Socialistische Partij"]},
+    "DENK": {"aliases": ["Groep Kuzu/Öztürk"]},
+    "PvdD": {"aliases": ["Partij voor de Dieren"]},
+    "FvD": {"aliases": ["FVD", "Forum voor Democratie"]},
+    "SGP": {"aliases": ["Staatkundig Gereformeerde Partij"]},
+    "CU": {"aliases": ["ChristenUnie"]},
+    "Volt": {"aliases": []},
+    "JA21": {"aliases": [], "lineage": ["FvD"]},
+    "50PLUS": {"aliases": ["50PLUS/Baay-Timmerman", "50PLUS/Klein", "50PLUS/Krol"]},
+    "BIJ1": {"aliases": []},
+    "BVNL": {"aliases": ["Belang van Nederland"]},
+    # Merged or split-off parties still found in older data
+    "GL": {"aliases": ["GroenLinks"], "successor": "GL/PvdA"},
+    "PvdA": {"aliases": ["Partij van de Arbeid"], "successor": "GL/PvdA"},
+    "Fractie Den Haan": {"aliases": ["Fractie-Den Haan"]},
+    # Parties in the historical cabinets
+    "KVP": {"aliases": []},
+    "ARP": {"aliases": []},
+    "CHU": {"aliases": []},
+    "RKSP": {"aliases": []},
+    "SDAP": {"aliases": []},
+    "VDB": {"aliases": []},
+    "LSP": {"aliases": []},
+    "PPR": {"aliases": []},
+    "DS'70": {"aliases": []},
+    "LPF": {"aliases": []},
+}
+
+# Speaker label of the chair in the transcripts
+CHAIR = "VOORZITTER"
+# Labels in the transcripts that are roles rather than parties
+NOT_A_PARTY = {
+    "lid der commissie", "lid van de commissie", "voorzitter van de commissie",
+    "voorzitter der commissie", "voorzitter van het stembureau", CHAIR, "lid Tweede Kamer",
+}
+# European Parliament delegations ("EP/CDA", "EP/CU/SGP", ...)
+EUROPEAN_PREFIX = "EP/"
+
+NAMES = list(PARTIES)
+IDS = {name: i for i, name in enumerate(NAMES)}
+
+_ALIASES = {}
+for _name, _party in PARTIES.items():
+    for _alias in [_name] + _party["aliases"]:
+        _ALIASES[_alias.lower()] = IDS[_name]
+
+
+def _closure(pid, seen=()):
+    """Bitmask of every predecessor of a party, following lineage transitively."""
+    mask = 0
+    for predecessor in PARTIES[NAMES[pid]].get("lineage", []):
+        p = IDS[predecessor]
+        if p not in seen:
+            mask |= (1 << p) | _closure(p, seen + (pid,))
+    return mask
+
+
+LINEAGE_MASKS = [_closure(pid) for pid in range(len(NAMES))]
+# What a party is matched against in historical data: its lineage, or itself
+EXPANSION_MASKS = [LINEAGE_MASKS[pid] or (1 << pid) for pid in range(len(NAMES))]
+
+
+# -------------------------------
+# Names <-> ids
+# -------------------------------
+def party_id(name):
+    """Stable integer id for any spelling of a party in PARTIES (KeyError for other names)."""
+    key = name.strip().lower()
+    if key not in _ALIASES:
+        raise KeyError(f"Unknown party: {name!r} (add it to party_registry.PARTIES)")
+    return _ALIASES[key]
+
+
+def party_name(pid):
+    return NAMES[pid]
+
+
+def canonical(name):
+    """Model name for a party spelling (e.g. 'ChristenUnie' -> 'CU'); unknown names are returned unchanged."""
+    pid = _ALIASES.get(name.strip().lower())
+    return NAMES[pid] if pid is not None else name
+
+
+def canonical_names(parties):
+    return [canonical(p) for p in parties]
+
+
+def is_party_label(name):
+    """False for committee roles and European Parliament labels found in the transcripts."""
+    return name not in NOT_A_PARTY and not name.startswith(EUROPEAN_PREFIX)
+
+
+def current_party(name):
+    """Party that continues ``name`` today (e.g. 'GroenLinks' -> 'GL/PvdA'); unknown names unchanged."""
+    name = canonical(name)
+    while name in PARTIES and "successor" in PARTIES[name]:
+        name = PARTIES[name]["successor"]
+    return name
+
+
+def has_lineage(name):
+    return name in PARTIES and LINEAGE_MASKS[IDS[name]] != 0
+
+
+# -------------------------------
+# Bitmasks
+# -------------------------------
+# Masks are built from model names (canonical() spellings first). A name that
+# is not a model party, such as a new party in a poll, gets a bit above the
+# registry ids for the rest of the session: it only overlaps with itself and
+# never gets a party id.
+_EXTRA_BITS = {}
+
+
+def _bit(name):
+    if name in IDS:
+        return IDS[name]
+    if name not in _EXTRA_BITS:
+        _EXTRA_BITS[name] = len(NAMES) + len(_EXTRA_BITS)
+    return _EXTRA_BITS[name]
+
+
+@lru_cache(maxsize=None)
+def coalition_mask(parties):
+    """Bitmask of a tuple of party names."""
+    mask = 0
+    for name in parties:
+        mask |= 1 << _bit(name)
+    return mask
+
+
+@lru_cache(maxsize=None)
+def expanded_mask(parties):
+    """Bitmask of a coalition with every party replaced by its (transitive) lineage."""
+    mask = 0
+    for name in parties:
+        mask |= EXPANSION_MASKS[IDS[name]] if name in IDS else 1 << _bit(name)
+    return mask
+
+
+def mask_names(mask):
+    """Party names in a bitmask, in id order."""
+    names = NAMES + list(_EXTRA_BITS)
+    return [names[bit] for bit in range(len(names)) if mask >> bit & 1]
+
+
+def popcount(mask):
+    return bin(mask).count("1")
@@ -0,0 +1,219 @@
+import os
+import re
+import json
+import asyncio
+from datetime import datetime
+import requests
+from bs4 import BeautifulSoup
+from party_registry import canonical
+
+# -------------------------------
+# Poll ingestion with conditional requests and a local replay cache
+# -------------------------------
+# Every source is fetched concurrently with If-None-Match / If-Modified-Since,
+# so unchanged pages cost a 304 and are not downloaded again. Raw responses
+# are kept in POLL_CACHE_DIR/<source>/ and parsing always runs on that copy,
+# which means saved pages can be re-parsed (and tested) fully offline.
+# The cache itself is not committed. A saved peilingennederland page (Maurice
+# de Hond, 17-10-2025, then Ipsos I&O) to check the parser against is kept
+# apart from it, so a fetch never overwrites it and it is never taken for
+# the latest poll:
+#     parse_cached(cache_dir="../tests/fixtures/poll_cache")
+#
+# In a notebook (top-level await):   polls = await ingest_polls()
+# From a script:                     polls = asyncio.run(ingest_polls())
+
+POLL_CACHE_DIR = "poll_cache"
+
+# -------------------------------
+# Pollster names (one table for display names, file ids and spelling variants)
+# -------------------------------
+POLLSTERS = {
+    "mauricedehond": {"name": "Maurice de Hond", "file": "MauricedeHond",
+                      "aliases": ["mauricedehond", "dehond", "peilnl", "mauricedehondpeilnl"]},
+    "ipsosio": {"name": "Ipsos I&O", "file": "IpsosIO",
+                "aliases": ["ipsosio", "ipsosi&o", "ipsos", "i&o", "i&oresearch", "ipsosi&oresearch"]},
+    "verian": {"name": "Verian", "file": "Verian",
+               "aliases": ["verian", "eenvandaag", "verianeenvandaag", "kantar", "kantarpublic"]},
+    "tweedekamerverkiezing": {"name": "Tweede Kamer verkiezing", "file": "TweedeKamerVerkiezing",
+                              "aliases": ["tweedekamerverkiezing", "tweedekamerverkiezingen", "verkiezing", "verkiezingsuitslag"]},
+}
+
+# Squashed spelling -> POLLSTERS key. Names are matched whole, so a pollster
+# that merely contains an alias (e.g. "Ipsos Public Affairs") stays unknown.
+_ALIASES = {alias: key for key, pollster in POLLSTERS.items() for alias in pollster["aliases"]}
+
+
+def _squash(name):
+    return re.sub(r"[\s\-_.()]", "", name.lower())
+
+
+def normalize_pollster(name):
+    """Return the POLLSTERS key for a pollster name as written anywhere (None if unknown)."""
+    return _ALIASES.get(_squash(name))
+
+
+def pollster_file_id(name):
+    """Pollster part of the poll file names (e.g. 'MauricedeHond')."""
+    key = normalize_pollster(name)
+    if key is not None:
+        return POLLSTERS[key]["file"]
+    return re.sub(r"[^\w-]", "", re.sub(r"\s+", "", name))
+
+
+def pollster_display_name(name):
+    """Readable pollster name for the website (e.g. 'Ipsos I&O')."""
+    key = normalize_pollster(name)
+    return POLLSTERS[key]["name"] if key is not None else name
+
+
+# -------------------------------
+# Parsers (html -> list of polls)
+# -------------------------------
+def parse_peilingennederland(html):
+    """Extract the most recent poll (pollster, date, seats) from peilingennederland.nl."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    poll_name = None
+    poll_date = None
+
+    # Look for headers like "Peiling Maurice de Hond (04-10-2025)"
+    for header in soup.find_all(['h1', 'h2', 'h3', 'h4']):
+        text = header.get_text().strip()
+        date_match = re.search(r'\((\d{1,2})-(\d{1,2})-(\d{4})\)', text)
+        if date_match:
+            day, month, year = date_match.groups()
+            poll_date = f"{day.zfill(2)}-{month.zfill(2)}-{year}"
+            pollster_match = re.search(r'Peiling\s+(.+?)\s*\(', text, re.IGNORECASE)
+            if pollster_match:
+                poll_name = pollster_match.group(1).strip()
+            break
+
+    # Alternative: look in the page title
+    if poll_date is None:
+        title = soup.find('title')
+        if title:
+            date_match = re.search(r'(\d{1,2})-(\d{1,2})-(\d{4})', title.get_text())
+            if date_match:
+                day, month, year = date_match.groups()
+                poll_date = f"{day.zfill(2)}-{month.zfill(2)}-{year}"
+
+    # The first <span> block with at least 10 parties is the most recent poll
+    spans = soup.find_all("span", style=re.compile(r"color:rgb\(42, 42, 42\)"))
+    party_pattern = re.compile(r"([A-Za-z0-9\-\/]+):\s*(\d+)")
+
+    seats = {}
+    for span in spans:
+        matches = list(party_pattern.finditer(span.decode_contents()))
+        if len(matches) >= 10:
+            for match in matches:
+                party = match.group(1).replace('\u200b', '').strip()
+                seats[party] = int(match.group(2))
+            break
+
+    if not seats:
+        return []
+    return [{"pollster": poll_name, "date": poll_date, "seats": seats}]
+
+
+POLL_SOURCES = {
+    "peilingennederland": {
+        "url": "https://www.peilingennederland.nl/alle-peilingen.html",
+        "parser": parse_peilingennederland,
+    },
+}
+
+
+# -------------------------------
+# Fetching with the replay cache
+# -------------------------------
+def _cache_files(source, cache_dir):
+    folder = os.path.join(cache_dir, source)
+    return os.path.join(folder, "response.html"), os.path.join(folder, "meta.json")
+
+
+def _read_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fetch_conditional(source, url, cache_dir):
+    """Blocking conditional GET; stores the body and validators when the page changed."""
+    body_path, meta_path = _cache_files(source, cache_dir)
+    meta = _read_meta(meta_path) if os.path.exists(body_path) else {}
+
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = requests.get(url, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return False
+    response.raise_for_status()
+
+    os.makedirs(os.path.dirname(body_path), exist_ok=True)
+    with open(body_path, "wb") as f:
+        f.write(response.content)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": datetime.now().isoformat(timespec="seconds"),
+        }, f, indent=2)
+    return True
+
+
+async def fetch_sources(sources=POLL_SOURCES, cache_dir=POLL_CACHE_DIR):
+    """Fetch all sources concurrently; returns {source: changed}."""
+    names = list(sources)
+    results = await asyncio.gather(
+        *(asyncio.to_thread(_fetch_conditional, name, sources[name]["url"], cache_dir) for name in names),
+        return_exceptions=True,
+    )
+    changed = {}
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            print(f"⚠️  Could not fetch {name}: {result} (using cached copy if available)")
+            result = False
+        changed[name] = result
+    return changed
+
+
+def parse_cached(sources=POLL_SOURCES, cache_dir=POLL_CACHE_DIR, changed=None):
+    """Parse the cached responses into normalised polls (works offline)."""
+    polls = []
+    for name, source in sources.items():
+        body_path, _ = _cache_files(name, cache_dir)
+        if not os.path.exists(body_path):
+            continue
+        with open(body_path, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        for poll in source["parser"](html):
+            seats = {canonical(p): s for p, s in poll["seats"].items()}
+            pollster = poll["pollster"] or "Unknown"
+            polls.append({
+                "source": name,
+                "pollster": pollster_display_name(pollster),
+                "date": poll["date"],
+                "seat_distribution": dict(sorted(seats.items(), key=lambda x: -x[1])),
+                "filename_base": f"{poll['date']}-{pollster_file_id(pollster)}" if poll["date"] else None,
+                "changed": bool(changed.get(name, False)) if changed is not None else False,
+            })
+    return polls
+
+
+async def ingest_polls(sources=POLL_SOURCES, cache_dir=POLL_CACHE_DIR, offline=False):
+    """Fetch (unless offline) and parse every poll source."""
+    changed = None if offline else await fetch_sources(sources, cache_dir)
+    return parse_cached(sources, cache_dir, changed)
+
+
+if __name__ == "__main__":
+    for poll in asyncio.run(ingest_polls()):
+        status = "new" if poll["changed"] else "unchanged"
+        print(f"{poll['pollster']} ({poll['date']}) [{status}]: {poll['seat_distribution']}")
@@ -0,0 +1,376 @@
+import os
+import re
+import json
+import glob
+import hashlib
+import sqlite3
+from datetime import datetime
+from poll_ingestion import normalize_pollster, pollster_display_name, pollster_file_id
+
+# -------------------------------
+# SQLite store for polls and scored coalitions
+# -------------------------------
+# The database is the single source of truth for every poll that was run
+# through the model. The per-poll JSON files, the fallback copies and
+# poll-index.json in coalitions/ are only an export of it for the static site
+# (see export_static), so old polls no longer have to be deleted to keep the
+# folder tidy: they stay queryable here.
+#
+# The database is committed under data/, outside the published site folder:
+# the exports only keep the latest poll per pollster, so a database seeded
+# from them (open_store on a fresh checkout) would not have the history.
+
+RESULTS_DB = "../data/results.sqlite"
+EXPORT_DIR = "coalitions"
+SITE_PREFIX = "model/coalitions"
+
+MODES = ("with_biggest", "any")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY,
+    poll_id TEXT NOT NULL UNIQUE,
+    pollster TEXT NOT NULL,
+    pollster_name TEXT NOT NULL,
+    poll_date TEXT NOT NULL,
+    is_election INTEGER NOT NULL DEFAULT 0,
+    source TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_polls_pollster_date ON polls (pollster, poll_date);
+CREATE INDEX IF NOT EXISTS idx_polls_date ON polls (poll_date);
+
+CREATE TABLE IF NOT EXISTS seat_distributions (
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    party TEXT NOT NULL,
+    seats INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (poll_id, party)
+);
+CREATE INDEX IF NOT EXISTS idx_seats_party ON seat_distributions (party, seats);
+
+CREATE TABLE IF NOT EXISTS model_versions (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    script_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (script, script_hash, params)
+);
+
+CREATE TABLE IF NOT EXISTS coalitions (
+    id INTEGER PRIMARY KEY,
+    poll_id INTEGER NOT NULL REFERENCES polls (id) ON DELETE CASCADE,
+    model_version_id INTEGER REFERENCES model_versions (id),
+    mode TEXT NOT NULL CHECK (mode IN ('with_biggest', 'any')),
+    rank INTEGER NOT NULL,
+    parties TEXT NOT NULL,
+    seats INTEGER NOT NULL,
+    historical_score REAL,
+    ideology_score REAL,
+    ek_score REAL,
+    jsd_penalty REAL,
+    voting_score REAL,
+    party_penalty REAL,
+    surplus_penalty REAL,
+    final_score REAL NOT NULL,
+    details TEXT NOT NULL,
+    UNIQUE (poll_id, mode, rank)
+);
+CREATE INDEX IF NOT EXISTS idx_coalitions_parties ON coalitions (parties, mode, rank);
+
+CREATE TABLE IF NOT EXISTS coalition_parties (
+    coalition_id INTEGER NOT NULL REFERENCES coalitions (id) ON DELETE CASCADE,
+    party TEXT NOT NULL,
+    PRIMARY KEY (coalition_id, party)
+);
+CREATE INDEX IF NOT EXISTS idx_coalition_parties_party ON coalition_parties (party, coalition_id);
+"""
+
+
+def connect(path=RESULTS_DB):
+    """Open (and if needed create) the results database."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def coalition_key(parties):
+    """Order-independent key for a coalition, e.g. 'CDA|D66|GL/PvdA|VVD'."""
+    return "|".join(sorted(parties))
+
+
+def _iso_date(date):
+    """dd-mm-yyyy (as used in file names) -> yyyy-mm-dd (sortable)."""
+    return datetime.strptime(date, "%d-%m-%Y").strftime("%Y-%m-%d")
+
+
+def _file_date(iso_date):
+    return datetime.strptime(iso_date, "%Y-%m-%d").strftime("%d-%m-%Y")
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+# -------------------------------
+# Inserts (each call is one transaction)
+# -------------------------------
+def save_poll(conn, pollster, date, seat_distribution, poll_id=None, source=None):
+    """Insert or replace a poll and its seat distribution; returns the poll id (filename base).
+
+    ``date`` is dd-mm-yyyy. Replacing a poll also drops the coalitions that
+    were scored for its previous seat distribution.
+    """
+    key = normalize_pollster(pollster) or pollster_file_id(pollster)
+    poll_id = poll_id or f"{date}-{pollster_file_id(pollster)}"
+    seats = sorted(seat_distribution.items(), key=lambda x: -x[1])
+
+    with conn:
+        conn.execute("DELETE FROM polls WHERE poll_id = ?", (poll_id,))
+        row = conn.execute(
+            "INSERT INTO polls (poll_id, pollster, pollster_name, poll_date, is_election, source, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (poll_id, key, pollster_display_name(pollster), _iso_date(date),
+             int(key == "tweedekamerverkiezing"), source, _now()),
+        )
+        conn.executemany(
+            "INSERT INTO seat_distributions (poll_id, party, seats, position) VALUES (?, ?, ?, ?)",
+            [(row.lastrowid, party, int(n), i) for i, (party, n) in enumerate(seats)],
+        )
+    return poll_id
+
+
+def model_version(conn, script, params=None):
+    """Id of the (script contents, parameters) combination that produced a set of predictions."""
+    if os.path.exists(script):
+        with open(script, "rb") as f:
+            script_hash = hashlib.sha1(f.read()).hexdigest()
+    else:
+        script_hash = ""
+    params = json.dumps(params or {}, sort_keys=True)
+
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO model_versions (script, script_hash, params, created_at) VALUES (?, ?, ?, ?)",
+            (os.path.basename(script), script_hash, params, _now()),
+        )
+    row = conn.execute(
+        "SELECT id FROM model_versions WHERE script = ? AND script_hash = ? AND params = ?",
+        (os.path.basename(script), script_hash, params),
+    ).fetchone()
+    return row["id"]
+
+
+def save_predictions(conn, poll_id, mode, predictions, model_version_id=None):
+    """Replace the stored coalitions of one poll and mode by ``predictions`` (in rank order).
+
+    Entries are stored as the site expects them (coalition as a list and a
+    seat_distribution per coalition); the full entry is kept in ``details``.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    poll = conn.execute("SELECT id FROM polls WHERE poll_id = ?", (poll_id,)).fetchone()
+    if poll is None:
+        raise KeyError(f"Unknown poll {poll_id!r}; save_poll() it first")
+
+    with conn:
+        conn.execute("DELETE FROM coalitions WHERE poll_id = ? AND mode = ?", (poll["id"], mode))
+        for rank, p in enumerate(predictions, start=1):
+            row = conn.execute(
+                "INSERT INTO coalitions (poll_id, model_version_id, mode, rank, parties, seats, "
+                "historical_score, ideology_score, ek_score, jsd_penalty, voting_score, "
+                "party_penalty, surplus_penalty, final_score, details) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (poll["id"], model_version_id, mode, rank, coalition_key(p["coalition"]), p["seats"],
+                 p.get("historical_score"), p.get("ideology_score"), p.get("ek_score"),
+                 p.get("jsd_penalty"), p.get("voting_score"), p.get("party_penalty"),
+                 p.get("surplus_penalty"), p["final_score"], json.dumps(p, ensure_ascii=False)),
+            )
+            conn.executemany(
+                "INSERT INTO coalition_parties (coalition_id, party) VALUES (?, ?)",
+                [(row.lastrowid, party) for party in p["coalition"]],
+            )
+
+
+# -------------------------------
+# Queries
+# -------------------------------
+def seat_distribution(conn, poll_id):
+    rows = conn.execute(
+        "SELECT s.party, s.seats FROM seat_distributions s JOIN polls p ON p.id = s.poll_id "
+        "WHERE p.poll_id = ? ORDER BY s.position",
+        (poll_id,),
+    )
+    return {r["party"]: r["seats"] for r in rows}
+
+
+def predictions(conn, poll_id, mode):
+    rows = conn.execute(
+        "SELECT c.details FROM coalitions c JOIN polls p ON p.id = c.poll_id "
+        "WHERE p.poll_id = ? AND c.mode = ? ORDER BY c.rank",
+        (poll_id, mode),
+    )
+    return [json.loads(r["details"]) for r in rows]
+
+
+def polls(conn, pollster=None, start=None, end=None, include_elections=True):
+    """Polls (newest first), optionally for one pollster and/or a dd-mm-yyyy date range."""
+    query = "SELECT * FROM polls WHERE 1 = 1"
+    args = []
+    if pollster is not None:
+        query += " AND pollster = ?"
+        args.append(normalize_pollster(pollster) or pollster_file_id(pollster))
+    if start is not None:
+        query += " AND poll_date >= ?"
+        args.append(_iso_date(start))
+    if end is not None:
+        query += " AND poll_date <= ?"
+        args.append(_iso_date(end))
+    if not include_elections:
+        query += " AND is_election = 0"
+    query += " ORDER BY poll_date DESC, poll_id"
+    return [dict(r) for r in conn.execute(query, args)]
+
+
+def polls_with_coalition(conn, parties, max_rank=3, mode=None):
+    """Every poll in which exactly this coalition was ranked <= max_rank."""
+    query = (
+        "SELECT p.poll_id, p.pollster_name, p.poll_date, c.mode, c.rank, c.seats, c.final_score "
+        "FROM coalitions c JOIN polls p ON p.id = c.poll_id "
+        "WHERE c.parties = ? AND c.rank <= ?"
+    )
+    args = [coalition_key(parties), max_rank]
+    if mode is not None:
+        query += " AND c.mode = ?"
+        args.append(mode)
+    query += " ORDER BY p.poll_date DESC, c.mode"
+    return [dict(r) for r in conn.execute(query, args)]
+
+
+def polls_with_party(conn, party, max_rank=3, mode=None):
+    """Every poll in which some top-ranked coalition contains ``party``."""
+    query = (
+        "SELECT p.poll_id, p.poll_date, c.mode, c.rank, c.parties, c.final_score "
+        "FROM coalition_parties cp "
+        "JOIN coalitions c ON c.id = cp.coalition_id JOIN polls p ON p.id = c.poll_id "
+        "WHERE cp.party = ? AND c.rank <= ?"
+    )
+    args = [party, max_rank]
+    if mode is not None:
+        query += " AND c.mode = ?"
+        args.append(mode)
+    query += " ORDER BY p.poll_date DESC, c.mode, c.rank"
+    return [dict(r) for r in conn.execute(query, args)]
+
+
+# -------------------------------
+# Static export for the website
+# -------------------------------
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def site_polls(conn):
+    """Polls shown on the site: the newest poll of every pollster plus all elections."""
+    return [dict(r) for r in conn.execute(
+        "SELECT * FROM polls p WHERE p.is_election = 1 OR p.poll_date = "
+        "(SELECT MAX(q.poll_date) FROM polls q WHERE q.pollster = p.pollster) "
+        "ORDER BY p.is_election, p.poll_date DESC, p.poll_id"
+    )]
+
+
+def poll_label(poll):
+    """Name of a poll in the site's dropdown."""
+    if poll["is_election"]:
+        return f"Tweede Kamer verkiezing {poll['poll_date'][:4]}"
+    return f"{poll['pollster_name']} ({_file_date(poll['poll_date'])})"
+
+
+def export_static(conn, export_dir=EXPORT_DIR, current=None):
+    """Write the per-poll JSON files, fallback copies and poll-index.json for the site.
+
+    ``current`` is the poll id used for the fallback files (default: the
+    newest non-election poll). Per-poll files of polls that are no longer
+    shown are removed; they remain available in the database.
+    """
+    shown = site_polls(conn)
+    if current is None:
+        current = next((p["poll_id"] for p in shown if not p["is_election"]), shown[0]["poll_id"] if shown else None)
+
+    poll_index = []
+    written = set()
+    for poll in shown:
+        poll_id = poll["poll_id"]
+        files = {
+            "seats": f"verdeling-{poll_id}.json",
+            "coalitionWithBiggest": f"coalition_data_with_biggest-{poll_id}.json",
+            "coalitionAny": f"coalition_data_any-{poll_id}.json",
+        }
+        _write_json(os.path.join(export_dir, files["seats"]), seat_distribution(conn, poll_id))
+        _write_json(os.path.join(export_dir, files["coalitionWithBiggest"]), predictions(conn, poll_id, "with_biggest"))
+        _write_json(os.path.join(export_dir, files["coalitionAny"]), predictions(conn, poll_id, "any"))
+        written.update(files.values())
+
+        poll_index.append({
+            "id": poll_id,
+            "name": poll_label(poll),
+            "date": _file_date(poll["poll_date"]),
+            "timestamp": datetime.strptime(poll["poll_date"], "%Y-%m-%d").timestamp(),
+            "isElection": bool(poll["is_election"]),
+            "files": {kind: f"{SITE_PREFIX}/{name}" for kind, name in files.items()},
+        })
+
+    _write_json(os.path.join(export_dir, "poll-index.json"), poll_index)
+
+    if current is not None:
+        _write_json(os.path.join(export_dir, "verdeling.json"), seat_distribution(conn, current))
+        _write_json(os.path.join(export_dir, "coalition_data_with_biggest.json"), predictions(conn, current, "with_biggest"))
+        _write_json(os.path.join(export_dir, "coalition_data_any.json"), predictions(conn, current, "any"))
+
+    removed = []
+    for pattern in ("verdeling-*.json", "coalition_data_any-*.json", "coalition_data_with_biggest-*.json"):
+        for path in glob.glob(os.path.join(export_dir, pattern)):
+            if os.path.basename(path) not in written:
+                os.remove(path)
+                removed.append(os.path.basename(path))
+
+    return poll_index, removed
+
+
+# -------------------------------
+# One-off import of the existing JSON files
+# -------------------------------
+def import_json_dir(conn, export_dir=EXPORT_DIR):
+    """Load every verdeling-<dd-mm-yyyy>-<Pollster>.json (and its coalition files) into the store."""
+    imported = []
+    for path in sorted(glob.glob(os.path.join(export_dir, "verdeling-*.json"))):
+        poll_id = os.path.basename(path)[len("verdeling-"):-len(".json")]
+        match = re.match(r"(\d{2}-\d{2}-\d{4})-(.+)$", poll_id)
+        if not match:
+            continue
+        date, pollster = match.groups()
+        with open(path, "r", encoding="utf-8") as f:
+            seats = json.load(f)
+        save_poll(conn, pollster, date, seats, poll_id=poll_id, source="json")
+
+        for mode in MODES:
+            coalition_file = os.path.join(export_dir, f"coalition_data_{mode}-{poll_id}.json")
+            if os.path.exists(coalition_file):
+                with open(coalition_file, "r", encoding="utf-8") as f:
+                    save_predictions(conn, poll_id, mode, json.load(f))
+        imported.append(poll_id)
+    return imported
+
+
+def open_store(path=RESULTS_DB, export_dir=EXPORT_DIR):
+    """Connect to the store, seeding a new database from the exported JSON files."""
+    is_new = not os.path.exists(path)
+    conn = connect(path)
+    if is_new:
+        imported = import_json_dir(conn, export_dir)
+        print(f"Created {path} from {len(imported)} exported polls")
+    return conn
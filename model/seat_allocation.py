@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from party_registry import canonical
+
+# -------------------------------
+# Votes -> Tweede Kamer seats (D'Hondt with the electoral threshold)
+# -------------------------------
+# Seats are allocated as for the Tweede Kamer since 2017: a party needs at
+# least one full quota (total valid votes / 150) to take part, and the 150
+# seats go to the largest averages votes / (seats + 1) among those parties.
+# Every party first gets floor(votes / quota') seats, with quota' the quota
+# over the qualifying votes (D'Hondt never gives less), so at most one seat
+# per party is left to hand out by averages. Both steps work on a whole
+# matrix of vote vectors at once.
+#
+# Ties between equal averages go to the party listed first (the law draws lots).
+
+TOTAL_SEATS = 150
+VOTES_FILE = "../data/zetelverdeling/zetel-data/fractie-verdeling.csv"
+RESULTS_FILE = "../data/zetelverdeling/zetel-data/verkiezingsuitslag/Historische_zetelverdeling_Tweede_Kamer_2002-2023.csv"
+
+
+def allocate_seats(votes, seats=TOTAL_SEATS, total_votes=None):
+    """Seats per party for one vote vector or a (scenarios x parties) matrix.
+
+    ``votes`` may be counts or shares. ``total_votes`` (per scenario) is the
+    total the quota is based on, including parties that are not listed;
+    by default the listed votes are the total.
+    """
+    votes = np.asarray(votes, dtype=float)
+    single = votes.ndim == 1
+    votes = np.atleast_2d(votes)
+
+    total = votes.sum(axis=1) if total_votes is None else np.broadcast_to(np.asarray(total_votes, dtype=float), votes.shape[:1])
+    quota = total / seats
+    eligible = np.where(votes >= quota[:, None], votes, 0.0)
+
+    eligible_total = eligible.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        allocated = np.where(eligible_total > 0, np.floor(eligible * seats / eligible_total), 0).astype(np.int64)
+
+    # Remaining seats (fewer than the number of parties) by largest averages
+    remaining = seats - allocated.sum(axis=1)
+    rows = np.arange(len(votes))
+    while (remaining > 0).any():
+        open_rows = rows[remaining > 0]
+        averages = eligible[open_rows] / (allocated[open_rows] + 1)
+        allocated[open_rows, averages.argmax(axis=1)] += 1
+        remaining[open_rows] -= 1
+
+    # Scenarios where nobody reaches the threshold get no seats
+    allocated[eligible_total[:, 0] == 0] = 0
+    return allocated[0] if single else allocated
+
+
+def seat_distribution(votes_by_party, seats=TOTAL_SEATS, total_votes=None):
+    """{party: votes} -> {party: seats}, sorted by seats, in the format predict_coalitions expects."""
+    parties = [canonical(p) for p in votes_by_party]
+    allocated = allocate_seats(list(votes_by_party.values()), seats, total_votes)
+    return dict(sorted(zip(parties, allocated.tolist()), key=lambda x: -x[1]))
+
+
+def seat_scenarios(votes, seats=TOTAL_SEATS, total_votes=None):
+    """Seat distributions for many vote (or share) scenarios at once.
+
+    ``votes`` is a DataFrame with one column per party and one row per
+    scenario; returns the seats as a DataFrame of the same shape. A row
+    becomes a seat_distribution with ``row[row > 0].sort_values(ascending=False).to_dict()``.
+    """
+    allocated = allocate_seats(votes.to_numpy(dtype=float), seats, total_votes)
+    return pd.DataFrame(allocated, index=votes.index, columns=[canonical(p) for p in votes.columns])
+
+
+# -------------------------------
+# Check against the official results
+# -------------------------------
+def current_votes(path=VOTES_FILE):
+    """Votes of the parties in the current Tweede Kamer (2023 election), by model party name."""
+    fracties = pd.read_csv(path)
+    current = fracties[fracties["datumInactief"].isna() & fracties["aantalStemmen"].notna()]
+    current = current.drop_duplicates(subset="afkorting")
+    return {canonical(p): int(v) for p, v in zip(current["afkorting"], current["aantalStemmen"])}
+
+
+def official_seats(year, path=RESULTS_FILE):
+    table = pd.read_csv(path).set_index("Partij").drop(index="Totaal", errors="ignore")
+    column = table[str(year)].dropna()
+    return {canonical(p): int(n) for p, n in column.items() if n > 0}
+
+
+def check_against_results(year=2023):
+    """Allocate the stored votes and compare with the official seats; returns the differences."""
+    allocated = seat_distribution(current_votes())
+    official = official_seats(year)
+    return {p: (allocated.get(p, 0), official.get(p, 0))
+            for p in sorted(set(allocated) | set(official))
+            if allocated.get(p, 0) != official.get(p, 0)}
+
+
+if __name__ == "__main__":
+    differences = check_against_results()
+    if differences:
+        print("Allocated vs official seats differ:", differences)
+    else:
+        print("2023: allocated seats match the official result")
@@ -0,0 +1,122 @@
+import os
+import re
+import glob
+import gzip
+import json
+import hashlib
+from results_store import MODES, EXPORT_DIR, SITE_PREFIX, poll_label, predictions, seat_distribution, site_polls
+
+try:
+    import brotli
+except ImportError:  # optional: only the gzip copy is written without it
+    brotli = None
+
+# -------------------------------
+# Single compact bundle of all polls for index.html
+# -------------------------------
+# Instead of poll-index.json plus three files per poll, the site loads one
+# bundle-<hash>.json with every poll it shows. Party names are stored once
+# and referenced by position, coalition scores are stored per column, and
+# seat_distribution per coalition is left out (the page rebuilds it from the
+# poll's seats). The content hash in the name means a file never changes once
+# published, so it can be cached indefinitely; .gz/.br copies are written next
+# to it for hosts that serve precompressed files.
+#
+# index.html gets the current file name between the POLL_BUNDLE markers.
+
+HTML_FILE = "../index.html"
+BUNDLE_VERSION = 1
+
+# Per-coalition fields that are not plain score columns
+_SPECIAL_FIELDS = ("coalition", "seat_distribution", "stability")
+STABILITY_FIELDS = ("party", "gain", "gain_rank", "loss", "loss_rank")
+
+_MARKER = re.compile(
+    r"(// POLL_BUNDLE:START[^\n]*\n)(.*?)(\s*// POLL_BUNDLE:END)",
+    re.DOTALL,
+)
+
+
+def _party_ref(parties, index, name):
+    if name not in index:
+        index[name] = len(parties)
+        parties.append(name)
+    return index[name]
+
+
+def _columns(entries, parties, index):
+    """Coalition entries (as exported for the site) -> one array per field."""
+    fields = []
+    for entry in entries:
+        for field in entry:
+            if field not in _SPECIAL_FIELDS and field not in fields:
+                fields.append(field)
+
+    columns = {"coalition": [[_party_ref(parties, index, p) for p in e["coalition"]] for e in entries]}
+    for field in fields:
+        columns[field] = [e.get(field) for e in entries]
+    if any("stability" in e for e in entries):
+        # One [party, gain, gain_rank, loss, loss_rank] row per party in the coalition;
+        # a band without a gain (or loss) event has null there
+        columns["stability"] = [
+            [[_party_ref(parties, index, s["party"])] + [s.get(f) for f in STABILITY_FIELDS[1:]] for s in e.get("stability", [])]
+            for e in entries
+        ]
+    return columns
+
+
+def build_bundle(conn, polls=None):
+    """Bundle (as a dict) of every poll the site shows, in poll-index order."""
+    parties, index = [], {}
+    bundle_polls = []
+    for poll in polls if polls is not None else site_polls(conn):
+        seats = seat_distribution(conn, poll["poll_id"])
+        bundle_polls.append({
+            "id": poll["poll_id"],
+            "name": poll_label(poll),
+            "date": poll["poll_date"],
+            "isElection": bool(poll["is_election"]),
+            "parties": [_party_ref(parties, index, p) for p in seats],
+            "seats": list(seats.values()),
+            "coalitions": {mode: _columns(predictions(conn, poll["poll_id"], mode), parties, index) for mode in MODES},
+        })
+    return {"version": BUNDLE_VERSION, "parties": parties, "stabilityFields": list(STABILITY_FIELDS), "polls": bundle_polls}
+
+
+def write_bundle(conn, export_dir=EXPORT_DIR, html_file=HTML_FILE):
+    """Write bundle-<hash>.json (+ .gz/.br), remove older bundles and point index.html at it."""
+    body = json.dumps(build_bundle(conn), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    filename = f"bundle-{digest}.json"
+    path = os.path.join(export_dir, filename)
+
+    with open(path, "wb") as f:
+        f.write(body)
+    with open(path + ".gz", "wb") as f:
+        # mtime=0 keeps the compressed copy byte-identical between runs
+        f.write(gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + ".br", "wb") as f:
+            f.write(brotli.compress(body, quality=11))
+    else:
+        print("⚠️  brotli is not installed, only the gzip copy was written")
+
+    for old in glob.glob(os.path.join(export_dir, "bundle-*.json*")):
+        if not os.path.basename(old).startswith(filename):
+            os.remove(old)
+
+    if html_file is not None:
+        set_html_bundle(f"{SITE_PREFIX}/{filename}", html_file)
+    return filename, len(body)
+
+
+def set_html_bundle(url, html_file=HTML_FILE):
+    """Rewrite the POLL_BUNDLE constant in index.html."""
+    with open(html_file, "r", encoding="utf-8") as f:
+        html = f.read()
+    if not _MARKER.search(html):
+        raise ValueError(f"No POLL_BUNDLE markers found in {html_file}")
+    indent = re.search(r"\n([ \t]*)// POLL_BUNDLE:START", html).group(1)
+    html = _MARKER.sub(lambda m: f"{m.group(1)}{indent}const POLL_BUNDLE = '{url}';{m.group(3)}", html, count=1)
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(html)
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from party_registry import current_party, is_party_label
+
+# -------------------------------
+# Speaker -> party, by date
+# -------------------------------
+# The transcripts give a party for Kamerleden but not for ministers and
+# state secretaries, who speak under their surname only. This registry fills
+# in those speakers. A speaker maps either to one party for the whole corpus,
+# or to a list of (party, start, end) intervals when the surname belonged to
+# different people (namesakes) or the person changed party between cabinets.
+# Intervals are half-open [start, end); None leaves that end open.
+#
+# None as party means the speaker is deliberately left without a party:
+# the chair, European Parliament members and OCR fragments of names.
+
+SPEAKERS = {
+    "VOORZITTER": None,
+    "Opstelten": "VVD",
+    "Schouten": "CU",
+    "Kamp": "VVD",
+    "Blok": "VVD",
+    "Koolmees": "D66",
+    "Koenders": "GL/PvdA",
+    "Wiebes": "VVD",
+    "Knops": "CDA",
+    "Rutte": "VVD",
+    "Schippers": "VVD",
+    "Verhagen": "CDA",
+    "De Jonge": "CDA",
+    # Bruno Bruins (VVD, minister for Medische Zorg 2017-2019); Eppo Bruins (NSC, minister of OCW from July 2024)
+    "Bruins": [("VVD", None, "2024-07-02"), ("NSC", "2024-07-02", None)],
+    "Dijsselbloem": "GL/PvdA",
+    "Bruins Slot": "CDA",
+    "Hoekstra": "CDA",
+    "Van Weyenberg": "D66",
+    "Slob": "CU",
+    "Van Gennip": "CDA",
+    "Weerwind": "D66",
+    "Bussemaker": "GL/PvdA",
+    "Ollongren": "D66",
+    "Asscher": "GL/PvdA",
+    "Kuipers": "D66",
+    "Plasterk": "GL/PvdA",
+    "Helder": "VVD",
+    "Hillen": "CDA",
+    "Ploumen": "GL/PvdA",
+    "Grapperhaus": "CDA",
+    "Van Hijum": "NSC",
+    "Van Engelshoven": "D66",
+    "Schreinemacher": "VVD",
+    # Mona Keijzer: state secretary for CDA until 2021, minister for BBB from July 2024
+    "Keijzer": [("CDA", None, "2024-07-02"), ("BBB", "2024-07-02", None)],
+    "Agema": "PVV",
+    "Jetten": "D66",
+    "Spies": "CDA",
+    "Staghouwer": "CU",
+    "Dekker": "VVD",
+    # Jan Peter Balkenende, CDA prime minister 2002-2010
+    "Balkenende": "CDA",
+    "Harbers": "VVD",
+    "Donner": "CDA",
+    "Adema": "CU",
+    "Van Middelkoop": "CU",
+    "De Jager": "CDA",
+    "Adriaansens": "VVD",
+    "Kaag": "D66",
+    "Rosenthal": "VVD",
+    "Heinen": "VVD",
+    "Dijkgraaf": "D66",
+    "Schoof": None,
+    "Faber": "PVV",
+    "Timmermans": "GL/PvdA",
+    "Veldkamp": "NSC",
+    "Brekelmans": "VVD",
+    "Leers": "CDA",
+    "Van Leeuwen": "VVD",
+    "Bijleveld": "CDA",
+    "Dijkstra": "D66",
+    "Zijlstra": "VVD",
+    "Klever": "PVV",
+    "Hermans": "VVD",
+    "Van Rijn": "GL/PvdA",
+    "Madlener": "PVV",
+    "Paul": "VVD",
+    "Van Weel": "VVD",
+    "Beljaarts": "PVV",
+    "Uitermark": "NSC",
+    "Cramer": "GL/PvdA",
+    "Visser": "VVD",
+    "Bos": "GL/PvdA",
+    "Vogelaar": "GL/PvdA",
+    "Verburg": "CDA",
+    "Verburgiserduidelijkover": None,
+    "Boekhoudt": None,
+    "Verhagengeeftunoutoe": None,
+    "Boszeiwekengeleden": None,
+    "Hirsch Ballin": "CDA",
+    "Verhagenzeihetexpliciet": None,
+    "Antwoord": None,
+    "Ellian": "VVD",
+    "Azmani": "VVD",
+    "Van Baalen": "VVD",
+    "Groothuis": "VVD",
+    "In 't Veld": "GL/PvdA",
+    "Gerbrandy": "D66",
+    "Rafaela": "D66",
+    "De Lange": None,
+    "Lenaers": "CDA",
+    "Berendsen": None,
+    "Van de Camp": "CDA",
+    "Jongerius": "GL/PvdA",
+    "Tang": "GL/PvdA",
+    "Chahim": "GL/PvdA",
+    "Berman": "GL/PvdA",
+    "Eickhout": None,
+    "Sargentini": None,
+    "Cornelissen": None,
+    "Roos": None,
+    "Hoogeveen": None,
+    "Ruissen": None,
+    "Van Haersma Buma": "CDA",
+    "Smilde": "CDA",
+    "De Jong": None,
+    "Van Dalen": None,
+    "Hazekamp": None,
+    "Neppérus": "VVD",
+    "Haga": None,
+    "Belder": None,
+    "Pia Dijkstra": "D66",
+    # Dennis Wiersma (VVD, minister until June 2023); Femke Wiersma (BBB, minister from July 2024)
+    "Wiersma": [("VVD", None, "2023-06-01"), ("BBB", "2023-06-01", None)],
+    "De Graaff": None,
+}
+
+
+def membership_table(speakers=SPEAKERS):
+    """One row per (speaker, party, start, end) interval; open ends are NaT."""
+    rows = []
+    for speaker, entry in speakers.items():
+        intervals = entry if isinstance(entry, list) else [(entry, None, None)]
+        for party, start, end in intervals:
+            rows.append((speaker, party, start, end))
+    table = pd.DataFrame(rows, columns=["speaker", "party", "start", "end"])
+    table["start"] = pd.to_datetime(table["start"])
+    table["end"] = pd.to_datetime(table["end"])
+    return table
+
+
+# -------------------------------
+# Resolving a speech table
+# -------------------------------
+def clean_party_labels(parties):
+    """Transcript party labels -> model parties (None for roles and European labels).
+
+    Works on the distinct labels only, so the cost does not grow with the
+    number of speeches.
+    """
+    labels = parties.dropna().unique()
+    mapping = {label: current_party(label) if is_party_label(label) else None for label in labels}
+    return parties.astype(object).map(mapping)
+
+
+def speaker_parties(speakers, dates, memberships=None):
+    """Party for every (speaker, date) pair, from the interval that contains the date.
+
+    One merge_asof over all speeches: each speech is matched to the latest
+    interval of its speaker that started on or before its date, and kept if
+    that interval has not ended yet. Speeches without a date only get a
+    party when their speaker has a single open interval.
+    """
+    if memberships is None:
+        memberships = membership_table()
+    intervals = memberships.assign(start=memberships["start"].fillna(pd.Timestamp.min).astype("datetime64[ns]"))
+    intervals = intervals.sort_values("start", kind="stable")
+
+    speeches = pd.DataFrame({"speaker": np.asarray(speakers, dtype=object), "date": pd.to_datetime(dates).astype("datetime64[ns]")})
+    speeches["row"] = np.arange(len(speeches))
+    result = pd.Series(None, index=speeches["row"], dtype=object)
+
+    dated = speeches.dropna(subset=["date"]).sort_values("date", kind="stable")
+    matched = pd.merge_asof(dated, intervals, left_on="date", right_on="start", by="speaker")
+    current = matched["end"].isna() | (matched["date"] < matched["end"])
+    result.loc[matched.loc[current, "row"].to_numpy()] = matched.loc[current, "party"].to_numpy()
+
+    undated = speeches[speeches["date"].isna()]
+    always = memberships.groupby("speaker").filter(lambda g: len(g) == 1 and g["start"].isna().all() and g["end"].isna().all())
+    result.loc[undated["row"].to_numpy()] = undated["speaker"].map(always.set_index("speaker")["party"]).to_numpy()
+
+    return pd.Series(result.to_numpy(), index=getattr(speakers, "index", None), dtype=object)
+
+
+def resolve_parties(df, memberships=None):
+    """The party column of a speech table with missing parties filled in from the speaker registry."""
+    return df["party"].astype(object).fillna(speaker_parties(df["speaker"], df["date"], memberships))
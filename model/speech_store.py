@@ -0,0 +1,159 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# -------------------------------
+# Columnar store for the speech (classification) dataset
+# -------------------------------
+# The flat CSVs (party_speeches*.csv) are written once as Parquet datasets,
+# partitioned by party and year. Notebooks then read only the columns they
+# need through a memory-mapped reader instead of parsing the full CSV text.
+#
+# Usage from a notebook in a sibling folder (roberta/, methods/):
+#     import sys; sys.path.append("../model")
+#     from speech_store import read_speech_table
+#     df = read_speech_table("classification_cleaned", columns=["party", "date", "top_1_topic"])
+
+STORE_DIR = "../party_speeches_store"
+
+SOURCE_CSVS = {
+    "speeches": "../party_speeches.csv",
+    "classification": "../party_speeches_classification.csv",
+    "classification_cleaned": "../party_speeches_classification_cleaned.csv",
+}
+
+PARTITION_COLUMNS = ["party", "year"]
+# Read the partition keys with fixed types: inferred hive keys come back as
+# dictionaries that clash with the pandas metadata (year is Int16) and cannot
+# hold the null partition (rows without a party or date are written to
+# __HIVE_DEFAULT_PARTITION__, which this maps back to null)
+PARTITIONING = ds.partitioning(pa.schema([("party", pa.string()), ("year", pa.int16())]), flavor="hive")
+
+# Low-cardinality string columns, stored dictionary encoded
+CATEGORICAL_COLUMNS = [
+    "party", "speaker", "predicted_class",
+    "top_1_topic", "top_2_topic", "top_3_topic",
+]
+
+DUTCH_MONTHS = {
+    'januari': 'January', 'februari': 'February', 'maart': 'March',
+    'april': 'April', 'mei': 'May', 'juni': 'June',
+    'juli': 'July', 'augustus': 'August', 'september': 'September',
+    'oktober': 'October', 'november': 'November', 'december': 'December'
+}
+
+
+def parse_dutch_dates(dates):
+    """Parse a Series of Dutch dates ('26 januari 2016') into datetimes."""
+    english = dates.astype("string").str.lower()
+    for nl, en in DUTCH_MONTHS.items():
+        english = english.str.replace(nl, en, regex=False)
+    return pd.to_datetime(english, format="%d %B %Y", errors="coerce")
+
+
+def load_speech_dates(pdf_dates_csv="../data/api/pdf_dates.csv"):
+    """Return a Filename -> date mapping for the speech txt files."""
+    pdf_dates = pd.read_csv(pdf_dates_csv)
+    filenames = pdf_dates['pdf_name'].str.replace('.pdf', '.pdf.txt', regex=False)
+    return pd.Series(parse_dutch_dates(pdf_dates['date']).values, index=filenames)
+
+
+# -------------------------------
+# Writing
+# -------------------------------
+def _prepare_frame(df):
+    """Normalise column names and dtypes before writing to the store."""
+    df = df.rename(columns={'Filename': 'filename', 'Party': 'party',
+                            'Speaker': 'speaker', 'Speech': 'speech'})
+    df = df.copy()
+    df['id'] = df['id'].astype('int32')
+
+    if 'date' in df.columns:
+        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    df['year'] = df['date'].dt.year.astype('Int16') if 'date' in df.columns else pd.NA
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def write_speech_table(df, name, store_dir=STORE_DIR):
+    """Write a speech DataFrame (must contain an integer 'id') as a partitioned dataset.
+
+    The table replaces any earlier version as a whole: partitions that the new
+    data no longer has would otherwise stay on disk, and a row whose party or
+    year changed would be read twice. It is written next to the old one first,
+    so a failed write leaves the old table in place.
+    """
+    df = _prepare_frame(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    path = os.path.join(store_dir, name)
+    tmp_path = path + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    pq.write_to_dataset(
+        table,
+        root_path=tmp_path,
+        partition_cols=PARTITION_COLUMNS,
+    )
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def build_speech_store(store_dir=STORE_DIR, pdf_dates_csv="../data/api/pdf_dates.csv"):
+    """Convert the speech CSVs into the columnar store, attaching speech dates by id."""
+    speeches = pd.read_csv(SOURCE_CSVS["speeches"])
+    speeches['date'] = speeches['Filename'].map(load_speech_dates(pdf_dates_csv))
+    write_speech_table(speeches, "speeches", store_dir)
+
+    # The classification files only share the integer id with the speeches
+    dates = speeches.set_index('id')['date']
+    for name in ["classification", "classification_cleaned"]:
+        if not os.path.exists(SOURCE_CSVS[name]):
+            continue
+        df = pd.read_csv(SOURCE_CSVS[name])
+        # Older cleaned files carry a misaligned date column; rebuild it from the id
+        df['date'] = df['id'].map(dates)
+        # The speech text lives in the speeches table; join on id when needed
+        df = df.drop(columns=['speech'], errors='ignore')
+        write_speech_table(df, name, store_dir)
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def read_speech_table(name, columns=None, parties=None, years=None, store_dir=STORE_DIR):
+    """Read (a projection of) a stored table as a DataFrame.
+
+    Only the requested columns are decoded and the Parquet files are memory
+    mapped, so e.g. ``columns=['party', 'date', 'top_1_topic']`` never touches
+    the speech text. ``parties`` and ``years`` prune whole partitions.
+    """
+    filters = []
+    if parties is not None:
+        filters.append(('party', 'in', list(parties)))
+    if years is not None:
+        filters.append(('year', 'in', [int(y) for y in years]))
+
+    table = pq.read_table(
+        os.path.join(store_dir, name),
+        columns=columns,
+        filters=filters or None,
+        memory_map=True,
+        partitioning=PARTITIONING,
+    )
+    df = table.to_pandas()
+    if 'party' in df.columns:
+        df['party'] = df['party'].astype('category')
+    if 'id' in df.columns:
+        df = df.sort_values('id', kind='stable').reset_index(drop=True)
+    return df
+
+
+if __name__ == "__main__":
+    build_speech_store()
+    print(f"✅ Speech store written to: {STORE_DIR}")
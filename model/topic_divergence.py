@@ -0,0 +1,224 @@
+import json
+import numpy as np
+import pandas as pd
+from scipy.special import entr
+
+# -------------------------------
+# Batched Jensen-Shannon divergence between party topic distributions
+# -------------------------------
+# A speech counts towards an issue when one of its top-3 topics is in that
+# issue's group, and then contributes its full topic distribution (as in
+# jensen-shannon-divergence.ipynb). Summing those probabilities per issue,
+# period and party gives one (issue x period x party x topic) tensor; all
+# pairwise divergences of every issue and period then come out of a single
+# NumPy pass, using JSD(p, q) = H((p + q) / 2) - (H(p) + H(q)) / 2 with
+# scipy's entr (0 * log 0 = 0), so empty topics need no epsilon.
+#
+# Values are Jensen-Shannon distances in base 2 (the square root of the
+# divergence, as scipy's jensenshannon and mean_jsd_for_coalition use),
+# between 0 and 1. Parties without speeches on an issue in a period are NaN.
+
+ALL_ISSUES = "All"
+ALL_PERIODS = "all"
+
+ISSUE_GROUPS = {
+    'Economy': {'412', '413', '415'},
+    'Constitution': {'203', '204'},
+    'Environment': {'601', '602'},
+    'Immigration': {'701', '702'},
+    'Social Policy': {'501', '502'},
+}
+
+TOPIC_SLOTS = 3
+
+
+class LabeledArray:
+    """A NumPy array with named dimensions and labels along each of them (a small xarray.DataArray)."""
+
+    def __init__(self, values, dims, coords):
+        self.values = values
+        self.dims = tuple(dims)
+        self.coords = {dim: list(coords[dim]) for dim in self.dims}
+
+    def __repr__(self):
+        shape = ", ".join(f"{dim}: {len(self.coords[dim])}" for dim in self.dims)
+        return f"<LabeledArray ({shape})>"
+
+    def sel(self, **labels):
+        """Select one label along some dimensions (e.g. ``sel(issue="Economy", period=2021)``).
+
+        What is left is returned as a LabeledArray, or through to_pandas once
+        one or two dimensions remain (a single value when none remain).
+        """
+        index = []
+        for dim in self.dims:
+            index.append(self.coords[dim].index(labels[dim]) if dim in labels else slice(None))
+        dims = [dim for dim in self.dims if dim not in labels]
+        result = LabeledArray(self.values[tuple(index)], dims, self.coords)
+        if not dims:
+            return result.values.item()
+        return result.to_pandas() if len(dims) <= 2 else result
+
+    def to_pandas(self):
+        """A Series for one dimension, a DataFrame for two."""
+        if len(self.dims) == 1:
+            dim = self.dims[0]
+            return pd.Series(self.values, index=pd.Index(self.coords[dim], name=dim))
+        rows, columns = self.dims
+        return pd.DataFrame(self.values, index=pd.Index(self.coords[rows], name=rows),
+                            columns=pd.Index(self.coords[columns], name=columns))
+
+    def to_frame(self, name="value"):
+        """Long format: one row per combination of labels."""
+        index = pd.MultiIndex.from_product([self.coords[dim] for dim in self.dims], names=self.dims)
+        return pd.DataFrame({name: self.values.ravel()}, index=index)
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dims": self.dims,
+                "coords": self.coords,
+                "values": np.where(np.isnan(self.values), None, self.values).tolist(),
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(np.array(data["values"], dtype=float), data["dims"], data["coords"])
+
+
+# -------------------------------
+# Speeches -> (issue, period, party, topic) tensor
+# -------------------------------
+def speech_topics(df):
+    """Long frame of (speech, topic, prob) from the top_i_topic / top_i_prob columns.
+
+    ``speech`` is the row position in ``df``; topic labels like '412 - ...'
+    become their id ('412'), labels without an id are dropped.
+    """
+    slots = []
+    for i in range(1, TOPIC_SLOTS + 1):
+        topic = df[f'top_{i}_topic'].astype("string")
+        slots.append(pd.DataFrame({
+            "speech": np.arange(len(df)),
+            "topic": topic.str.split(" - ", n=1).str[0].str.strip().where(topic.str.contains(" - ", regex=False)),
+            "prob": df[f'top_{i}_prob'].to_numpy(dtype=float),
+        }))
+    long = pd.concat(slots, ignore_index=True).dropna(subset=["topic"])
+    # A topic in two slots of the same speech adds up, like build_topic_dist
+    return long.groupby(["speech", "topic"], as_index=False, sort=False)["prob"].sum()
+
+
+def _periods(df, period):
+    if period is None:
+        return pd.Series(ALL_PERIODS, index=df.index)
+    if period == "year" and "year" not in df.columns:
+        return pd.to_datetime(df["date"]).dt.year
+    return df[period]
+
+
+def topic_tensor(df, issue_groups=ISSUE_GROUPS, period=None):
+    """Summed topic probabilities per issue, period and party.
+
+    ``period`` is None (one slice with every speech), "year" (from the
+    ``year`` or ``date`` column) or the name of any column to slice by. The
+    first issue is ALL_ISSUES, which takes every speech.
+    """
+    df = df.dropna(subset=["party"])
+    long = speech_topics(df)
+
+    # (speech, issue) memberships, including every speech for ALL_ISSUES
+    topic_issues = pd.DataFrame(
+        [(topic, issue) for issue, topics in issue_groups.items() for topic in topics],
+        columns=["topic", "issue"],
+    )
+    members = long.merge(topic_issues, on="topic")[["speech", "issue"]].drop_duplicates()
+    members = pd.concat([pd.DataFrame({"speech": np.arange(len(df)), "issue": ALL_ISSUES}), members])
+    weights = members.merge(long, on="speech")
+
+    issues = [ALL_ISSUES] + list(issue_groups)
+    periods = _periods(df, period).to_numpy()
+    parties = df["party"].astype(str).to_numpy()
+
+    issue_code = pd.Categorical(weights["issue"], categories=issues).codes
+    period_code, period_labels = pd.factorize(periods[weights["speech"]], sort=True)
+    party_code, party_labels = pd.factorize(parties[weights["speech"]], sort=True)
+    topic_code, topic_labels = pd.factorize(weights["topic"], sort=True)
+
+    counts = np.zeros((len(issues), len(period_labels), len(party_labels), len(topic_labels)))
+    np.add.at(counts, (issue_code, period_code, party_code, topic_code), weights["prob"].to_numpy())
+    return LabeledArray(counts, ("issue", "period", "party", "topic"), {
+        "issue": issues,
+        "period": [p.item() if hasattr(p, "item") else p for p in period_labels],
+        "party": list(party_labels),
+        "topic": list(topic_labels),
+    })
+
+
+# -------------------------------
+# Pairwise divergences
+# -------------------------------
+def pairwise_jsd(counts, squared=False):
+    """Jensen-Shannon distance (base 2) between every pair of rows along the second-to-last axis.
+
+    ``counts`` has shape (..., party, topic); rows need not be normalised.
+    Returns (..., party, party); rows that sum to zero give NaN. With
+    ``squared=True`` the divergence itself is returned.
+    """
+    counts = np.asarray(counts, dtype=float)
+    totals = counts.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = counts / totals
+
+    entropy = entr(p).sum(axis=-1) / np.log(2)
+    mixture = (p[..., :, None, :] + p[..., None, :, :]) / 2
+    divergence = entr(mixture).sum(axis=-1) / np.log(2) - (entropy[..., :, None] + entropy[..., None, :]) / 2
+
+    # Rounding can push identical distributions just below zero
+    divergence = np.clip(divergence, 0.0, 1.0)
+    n = counts.shape[-2]
+    diagonal = np.arange(n)
+    divergence[..., diagonal, diagonal] = np.where(np.isnan(divergence[..., diagonal, diagonal]), np.nan, 0.0)
+    return divergence if squared else np.sqrt(divergence)
+
+
+def issue_divergence(df, issue_groups=ISSUE_GROUPS, period=None, squared=False):
+    """Pairwise party JSD for every issue and period, as a LabeledArray (issue, period, party, other)."""
+    tensor = topic_tensor(df, issue_groups, period)
+    return LabeledArray(pairwise_jsd(tensor.values, squared), ("issue", "period", "party", "other"), {
+        **tensor.coords, "other": tensor.coords["party"],
+    })
+
+
+def divergence_matrix(divergence, issue=ALL_ISSUES, period=None):
+    """Party x party DataFrame for one issue and period, without parties that have no speeches there."""
+    if period is None:
+        period = divergence.coords["period"][-1]
+    matrix = divergence.sel(issue=issue, period=period)
+    present = matrix.notna().any(axis=1)
+    return matrix.loc[present, present]
+
+
+# -------------------------------
+# Per-issue compatibility of a coalition
+# -------------------------------
+def issue_compatibility(divergence, coalition, period=None):
+    """Mean pairwise JSD of a coalition per issue (lower = closer), for the latest period by default.
+
+    Pairs involving a party without speeches on an issue are skipped, as in
+    mean_jsd_for_coalition; an issue with no usable pair is NaN.
+    """
+    if period is None:
+        period = divergence.coords["period"][-1]
+    parties = divergence.coords["party"]
+    members = [parties.index(p) for p in coalition if p in parties]
+    j = divergence.coords["period"].index(period)
+
+    block = divergence.values[:, j][:, members][:, :, members]
+    upper = np.triu_indices(len(members), k=1)
+    pairs = block[:, upper[0], upper[1]]
+    with np.errstate(invalid="ignore"):
+        with_data = (~np.isnan(pairs)).sum(axis=1)
+        means = np.where(with_data > 0, np.nansum(pairs, axis=1) / np.maximum(with_data, 1), np.nan)
+    return pd.Series(means, index=pd.Index(divergence.coords["issue"], name="issue"), name="jsd")
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import datetime
+import hashlib
+import numpy as np
+import pandas as pd
+import requests
+from scipy import sparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from party_registry import canonical
+
+# -------------------------------
+# Roll-call voting agreement from the Tweede Kamer OData feed
+# -------------------------------
+# Raw OData pages are cached on disk, keyed by their path and query relative
+# to the OData root. The cache doubles as an offline fixture: point
+# ``base_url`` at ``serve_cache()`` (or run with offline=True) to replay it.
+
+ODATA_ROOT = "/OData/v4/2.0"
+BASE_URL = "https://gegevensmagazijn.tweedekamer.nl" + ODATA_ROOT
+CACHE_DIR = "../data/api/odata_cache"
+AGREEMENT_FILE = "../data/api/voting_agreement.json"
+
+# Cached pages of the current year are fetched again once they are older than
+# this (seconds): votes are still being added there. Earlier years never change.
+CURRENT_YEAR_MAX_AGE = 24 * 3600
+
+# Vote types that count as participation (everything else is ignored)
+VOTE_VALUES = {"Voor": 1, "Tegen": -1}
+
+
+# -------------------------------
+# Cached ingestion
+# -------------------------------
+def _relative_url(url, base_url=BASE_URL):
+    """Strip the server part so the same page maps to the same cache entry everywhere."""
+    if url.startswith(base_url):
+        return url[len(base_url):]
+    if ODATA_ROOT in url:
+        return url.split(ODATA_ROOT, 1)[1]
+    return url
+
+
+def _cache_path(relative_url, cache_dir=CACHE_DIR):
+    key = hashlib.sha1(relative_url.encode("utf-8")).hexdigest()
+    entity = relative_url.lstrip("/").split("?", 1)[0] or "root"
+    return os.path.join(cache_dir, entity, f"{key}.json")
+
+
+def _is_fresh(path, max_age):
+    return os.path.exists(path) and (max_age is None or time.time() - os.path.getmtime(path) <= max_age)
+
+
+def fetch_pages(query, base_url=BASE_URL, cache_dir=CACHE_DIR, offline=False, max_age=None):
+    """Yield every page of an OData query (e.g. "/Stemming?$filter=..."), using the disk cache.
+
+    Cached pages older than ``max_age`` seconds are fetched again (None: keep
+    them forever, 0: always refresh). Offline, the cache is used regardless.
+    """
+    relative = query
+    while relative:
+        path = _cache_path(relative, cache_dir)
+        if _is_fresh(path, max_age) or (offline and os.path.exists(path)):
+            with open(path, "r", encoding="utf-8") as f:
+                page = json.load(f)
+        elif offline:
+            raise FileNotFoundError(f"No cached page for {relative} in {cache_dir}")
+        else:
+            response = requests.get(base_url + relative, timeout=60)
+            response.raise_for_status()
+            page = response.json()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(page, f, ensure_ascii=False)
+
+        yield page
+
+        next_link = page.get("@odata.nextLink")
+        relative = _relative_url(next_link, base_url) if next_link else None
+
+
+def fetch_votings(year, **kwargs):
+    """Return all Stemming records modified in a given year as a DataFrame.
+
+    The current year is refreshed after CURRENT_YEAR_MAX_AGE unless a
+    ``max_age`` is given.
+    """
+    if "max_age" not in kwargs and int(year) >= datetime.date.today().year:
+        kwargs["max_age"] = CURRENT_YEAR_MAX_AGE
+    query = f"/Stemming?$filter=year(GewijzigdOp)%20eq%20{year}"
+    records = []
+    for page in fetch_pages(query, **kwargs):
+        records.extend(page.get("value", []))
+    return pd.DataFrame(records)
+
+
+class _CacheHandler(BaseHTTPRequestHandler):
+    cache_dir = CACHE_DIR
+
+    def do_GET(self):
+        path = _cache_path(_relative_url(self.path), self.cache_dir)
+        if not os.path.exists(path):
+            self.send_error(404, "Page not in cache")
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_cache(cache_dir=CACHE_DIR, port=8000):
+    """Serve the page cache as a stand-in OData server at http://localhost:{port}/OData/v4/2.0."""
+    handler = type("CacheHandler", (_CacheHandler,), {"cache_dir": cache_dir})
+    server = ThreadingHTTPServer(("localhost", port), handler)
+    print(f"Serving {cache_dir} at http://localhost:{port}{ODATA_ROOT}")
+    server.serve_forever()
+
+
+# -------------------------------
+# Agreement matrices
+# -------------------------------
+def agreement_counts(votings):
+    """Count, for every pair of parties, the motions both voted on and the ones they agreed on.
+
+    Votes form a sparse motion x party matrix V with +1 (Voor) / -1 (Tegen),
+    and P = |V| marks participation. One product of [V | P] with itself gives
+    V'V (agreements minus disagreements) and P'P (co-participation) at once.
+    """
+    df = votings
+    if "Verwijderd" in df.columns:
+        df = df[~df["Verwijderd"].astype(bool)]
+    df = df[df["Soort"].isin(list(VOTE_VALUES))]
+    # ActorFractie spellings -> model names (party_registry), before de-duplicating
+    # so two spellings of one party can't both vote on the same motion
+    df = df.assign(ActorFractie=df["ActorFractie"].map(canonical, na_action="ignore"))
+    # Individual members' votes (no fractie) can't be attributed to a party
+    df = df.dropna(subset=["ActorFractie", "Besluit_Id"])
+    df = df.drop_duplicates(subset=["Besluit_Id", "ActorFractie"], keep="last")
+
+    parties = df["ActorFractie"]
+    motion_idx, motions = pd.factorize(df["Besluit_Id"])
+    party_idx, party_names = pd.factorize(parties, sort=True)
+    values = df["Soort"].map(VOTE_VALUES).to_numpy(dtype=np.int32)
+
+    shape = (len(motions), len(party_names))
+    votes = sparse.csr_matrix((values, (motion_idx, party_idx)), shape=shape)
+    stacked = sparse.hstack([votes, abs(votes)]).tocsc()
+    gram = (stacked.T @ stacked).toarray()
+
+    n = len(party_names)
+    net, both = gram[:n, :n], gram[n:, n:]
+    agree = (both + net) // 2
+    return list(party_names), agree, both, shape[0]
+
+
+def agreement_matrix(agree, both, parties):
+    """Share of co-voted motions on which two parties voted the same way."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(both > 0, agree / both, np.nan)
+    return pd.DataFrame(share, index=parties, columns=parties)
+
+
+def build_voting_agreement(years, output_file=AGREEMENT_FILE, **kwargs):
+    """Fetch (or replay) the votings for every year and store the per-year agreement counts."""
+    result = {}
+    for year in years:
+        votings = fetch_votings(year, **kwargs)
+        if votings.empty:
+            continue
+        parties, agree, both, n_motions = agreement_counts(votings)
+        result[str(year)] = {
+            "parties": parties,
+            "motions": n_motions,
+            "agree": agree.tolist(),
+            "both": both.tolist(),
+        }
+        print(f"{year}: {n_motions} motions, {len(parties)} parties")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False)
+    return result
+
+
+def load_voting_agreement(years=None, path=AGREEMENT_FILE):
+    """Load the stored counts and pool them over ``years`` (default: all) into one agreement matrix.
+
+    Returns None when no agreement data has been built yet.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        stored = json.load(f)
+
+    selected = [str(y) for y in years] if years is not None else list(stored)
+    parties = sorted({p for y in selected if y in stored for p in stored[y]["parties"]})
+    index = {p: i for i, p in enumerate(parties)}
+    agree = np.zeros((len(parties), len(parties)))
+    both = np.zeros((len(parties), len(parties)))
+
+    for y in selected:
+        if y not in stored:
+            continue
+        idx = [index[p] for p in stored[y]["parties"]]
+        agree[np.ix_(idx, idx)] += np.array(stored[y]["agree"])
+        both[np.ix_(idx, idx)] += np.array(stored[y]["both"])
+
+    return agreement_matrix(agree, both, parties)
+
+
+if __name__ == "__main__":
+    build_voting_agreement(range(2014, 2026))
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", "model"))
+from speaker_registry import SPEAKERS, speaker_parties
+
+
+def test_balkenende_is_cda():
+    # Jan Peter Balkenende led four CDA cabinets; the registry used to say VVD
+    assert SPEAKERS["Balkenende"] == "CDA"
+    speakers = pd.Series(["Balkenende"] * 3)
+    dates = pd.Series(pd.to_datetime(["2003-05-27", "2009-06-10", None]))
+    parties = speaker_parties(speakers, dates)
+    assert parties.tolist() == ["CDA", "CDA", "CDA"]
+
+
+def test_namesakes_follow_the_date():
+    speakers = pd.Series(["Bruins", "Bruins"])
+    parties = speaker_parties(speakers, pd.Series(pd.to_datetime(["2018-03-01", "2024-09-01"])))
+    assert parties.tolist() == ["VVD", "NSC"]